@@ -32,6 +32,67 @@ def list_plugins() -> list[str]:
     return plugin_list
 
 
+@management_app.command()
+def startup_profile(
+    top: int = typer.Option(15, help="Number of slowest modules to show"),
+) -> dict:
+    """
+    Profile import time and memory of the CLI and each plugin
+    """
+    from rescuebox.plugins import plugins  # Lazy Import
+    from rescuebox.startup_profile import (
+        plugin_module,
+        profile_import,
+        startup_budget_seconds,
+        time_cli_help,
+    )
+
+    total = profile_import("rescuebox.plugins")
+    help_seconds = time_cli_help()
+    print(
+        f"rescuebox --help: {help_seconds:.2f}s (budget {startup_budget_seconds():.2f}s)"
+    )
+    print(
+        f"All plugins: {total['seconds']:.2f}s, {total['memory_mb']:.1f} MB allocated"
+    )
+
+    print("Plugins (imported on their own):")
+    plugin_profiles = []
+    for plugin in plugins:
+        profile = profile_import(plugin_module(plugin))
+        print(
+            f"- {plugin.cli_name}: {profile['seconds']:.2f}s, "
+            f"{profile['memory_mb']:.1f} MB ({profile['module']})"
+        )
+        plugin_profiles.append(
+            {
+                "name": plugin.cli_name,
+                "module": profile["module"],
+                "seconds": profile["seconds"],
+                "memory_mb": profile["memory_mb"],
+            }
+        )
+
+    print(f"Slowest modules (cumulative, top {top}):")
+    modules = sorted(
+        total["modules"], key=lambda m: m["cumulative_seconds"], reverse=True
+    )[:top]
+    for module in modules:
+        print(
+            f"- {module['module']}: {module['cumulative_seconds']:.3f}s "
+            f"(self {module['self_seconds']:.3f}s)"
+        )
+
+    return {
+        "help_seconds": help_seconds,
+        "budget_seconds": startup_budget_seconds(),
+        "total_seconds": total["seconds"],
+        "total_memory_mb": total["memory_mb"],
+        "plugins": plugin_profiles,
+        "modules": modules,
+    }
+
+
 app.add_typer(management_app, name="manage")
 
 
@@ -0,0 +1,93 @@
+"""Measure how long the RescueBox CLI and its plugins take to import."""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Cold start budget for `rescuebox --help`, override with RESCUEBOX_STARTUP_BUDGET
+DEFAULT_STARTUP_BUDGET_SECONDS = 3.0
+
+_IMPORT_SCRIPT = """
+import importlib, json, sys, time, tracemalloc
+if sys.argv[2] == "1":
+    tracemalloc.start()
+start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+seconds = time.perf_counter() - start
+peak = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else None
+print(json.dumps({"seconds": seconds, "peak_bytes": peak}))
+"""
+
+
+def startup_budget_seconds() -> float:
+    return float(
+        os.environ.get("RESCUEBOX_STARTUP_BUDGET", DEFAULT_STARTUP_BUDGET_SECONDS)
+    )
+
+
+def parse_importtime(stderr: str) -> list[dict]:
+    """
+    Parse the output of `python -X importtime` into one entry per module.
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        modules.append(
+            {
+                "module": name.strip(),
+                "self_seconds": int(self_us) / 1e6,
+                "cumulative_seconds": int(cumulative_us) / 1e6,
+            }
+        )
+    return modules
+
+
+def profile_import(module: str) -> dict:
+    """
+    Import `module` in a fresh interpreter and report the wall time, the peak
+    Python memory allocated while importing it and the per-module breakdown.
+    Time and memory come from separate runs since tracing memory slows imports.
+    """
+    timed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _IMPORT_SCRIPT, module, "0"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    traced = subprocess.run(
+        [sys.executable, "-c", _IMPORT_SCRIPT, module, "1"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    seconds = json.loads(timed.stdout.splitlines()[-1])["seconds"]
+    peak_bytes = json.loads(traced.stdout.splitlines()[-1])["peak_bytes"]
+    return {
+        "module": module,
+        "seconds": seconds,
+        "memory_mb": peak_bytes / 2**20,
+        "modules": parse_importtime(timed.stderr),
+    }
+
+
+def time_cli_help() -> float:
+    """Wall time of `rescuebox --help` in a fresh interpreter."""
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", "from rescuebox.main import app; app(['--help'])"],
+        capture_output=True,
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+def plugin_module(plugin) -> str:
+    """Name of the module that defines a plugin's Typer app."""
+    for name, module in list(sys.modules.items()):
+        if getattr(module, "app", None) is plugin.app:
+            return name
+    raise ValueError(f"Could not find the module for plugin {plugin.cli_name}")
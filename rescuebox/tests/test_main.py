@@ -3,6 +3,7 @@ from importlib.metadata import version
 from typer.testing import CliRunner
 
 from rescuebox.main import app
+from rescuebox.startup_profile import startup_budget_seconds, time_cli_help
 
 runner = CliRunner()
 
@@ -11,3 +12,18 @@ def test_manage_info():
     result = runner.invoke(app, ["manage", "info"])
     assert result.exit_code == 0
     assert version("rescuebox") in result.stdout
+
+
+def test_manage_startup_profile():
+    result = runner.invoke(app, ["manage", "startup-profile", "--top", "5"])
+    assert result.exit_code == 0, result.stdout
+    assert "rescuebox --help" in result.stdout
+    assert "Slowest modules" in result.stdout
+
+
+def test_cli_help_startup_budget():
+    # run twice so a cold filesystem cache does not count against the budget
+    time_cli_help()
+    seconds = time_cli_help()
+    budget = startup_budget_seconds()
+    assert seconds < budget, f"rescuebox --help took {seconds:.2f}s (budget {budget}s)"
@@ -35,6 +35,35 @@ def iou_of(boxes0, boxes1, eps=1e-5):
     return overlap_area / (area0 + area1 - overlap_area + eps)
 
 
+def _greedy_suppress(box_scores, iou_threshold, top_k=-1):
+    """
+    Greedy suppression over boxes already sorted by descending score.
+    The pairwise IoU matrix is computed once.
+    Args:
+        box_scores (M, 5): sorted boxes in corner-form and probabilities.
+        iou_threshold: intersection over union threshold.
+        top_k: keep top_k results. If k <= 0, keep all the results.
+    Returns:
+        keep (M): boolean mask of the kept boxes
+    """
+    boxes = box_scores[:, :-1]
+    overlaps = iou_of(boxes[:, np.newaxis, :], boxes[np.newaxis, :, :])
+    suppress = overlaps > iou_threshold
+
+    keep = np.zeros(len(boxes), dtype=bool)
+    removed = np.zeros(len(boxes), dtype=bool)
+    kept = 0
+    for i in range(len(boxes)):
+        if removed[i]:
+            continue
+        keep[i] = True
+        kept += 1
+        if kept == top_k:
+            break
+        removed |= suppress[i]
+    return keep
+
+
 def hard_nms(box_scores, iou_threshold, top_k=-1, candidate_size=200):
     """
     Perform hard non-maximum-supression to filter out boxes with iou greater
@@ -48,25 +77,40 @@ def hard_nms(box_scores, iou_threshold, top_k=-1, candidate_size=200):
         picked: a list of indexes of the kept boxes
     """
     scores = box_scores[:, -1]
-    boxes = box_scores[:, :-1]
-    picked = []
     indexes = np.argsort(scores)
-    indexes = indexes[-candidate_size:]
-    while len(indexes) > 0:
-        current = indexes[-1]
-        picked.append(current)
-        if 0 < top_k == len(picked) or len(indexes) == 1:
-            break
-        current_box = boxes[current, :]
-        indexes = indexes[:-1]
-        rest_boxes = boxes[indexes, :]
-        iou = iou_of(
-            rest_boxes,
-            np.expand_dims(current_box, axis=0),
-        )
-        indexes = indexes[iou <= iou_threshold]
+    indexes = indexes[-candidate_size:][::-1]
+    keep = _greedy_suppress(box_scores[indexes], iou_threshold, top_k)
+    return box_scores[indexes[keep], :]
 
-    return box_scores[picked, :]
+
+def batched_hard_nms(box_scores, groups, iou_threshold, top_k=-1, candidate_size=200):
+    """
+    Perform hard non-maximum-supression independently for every group of
+    boxes (e.g. per class or per image) in a single pass.
+    Args:
+        box_scores (N, 5): boxes in corner-form and probabilities.
+        groups (N): group id of each box.
+        iou_threshold: intersection over union threshold.
+        top_k: keep top_k results per group. If k <= 0, keep all the results.
+        candidate_size: only consider the candidates with the highest scores
+            in each group.
+    Returns:
+        picked: indexes of the kept boxes, ordered by group and then by
+            descending score
+    """
+    scores = box_scores[:, -1]
+    order = np.lexsort((-scores, groups))
+    _, group_starts = np.unique(groups[order], return_index=True)
+    group_ends = np.append(group_starts[1:], len(order))
+
+    # IoU is only computed within a group, so the cost grows with the
+    # number of groups rather than with its square
+    picked = []
+    for start, end in zip(group_starts, group_ends):
+        group_order = order[start : min(end, start + candidate_size)]
+        keep = _greedy_suppress(box_scores[group_order], iou_threshold, top_k)
+        picked.append(group_order[keep])
+    return np.concatenate(picked) if picked else np.array([], dtype=np.int64)
 
 
 def predict(
@@ -86,41 +130,67 @@ def predict(
         labels (k): an array of labels for each boxes kept
         probs (k): an array of probabilities for each boxes being in corresponding labels
     """
-    boxes = boxes[0]
-    confidences = confidences[0]
-    # print(boxes)
-    # print(confidences)
-
-    picked_box_probs = []
-    picked_labels = []
-    for class_index in range(1, confidences.shape[1]):
-        # print(confidences.shape[1])
-        probs = confidences[:, class_index]
-        # print(probs)
-        mask = probs > prob_threshold
-        probs = probs[mask]
-
-        if probs.shape[0] == 0:
+    return predict_batch(
+        [width],
+        [height],
+        confidences[:1],
+        boxes[:1],
+        prob_threshold,
+        iou_threshold=iou_threshold,
+        top_k=top_k,
+    )[0]
+
+
+def predict_batch(
+    widths, heights, confidences, boxes, prob_threshold, iou_threshold=0.5, top_k=-1
+):
+    """
+    Select boxes that contain human faces for a batch of images, running
+    non-maximum-supression for every image and class in a single pass.
+    Args:
+        widths (B): original image widths
+        heights (B): original image heights
+        confidences (B, N, C): confidence array
+        boxes (B, N, 4): boxes array in corner-form
+        iou_threshold: intersection over union threshold.
+        top_k: keep top_k results per image and class. If k <= 0, keep all the results.
+    Returns:
+        a list of (boxes, labels, probs) tuples, one per image, as in `predict`
+    """
+    num_images, _, num_classes = confidences.shape
+    # every (image, box, class) triple above the threshold, background excluded
+    image_index, box_index, class_index = np.nonzero(
+        confidences[:, :, 1:] > prob_threshold
+    )
+    class_index += 1
+    box_probs = np.concatenate(
+        [
+            boxes[image_index, box_index, :],
+            confidences[image_index, box_index, class_index].reshape(-1, 1),
+        ],
+        axis=1,
+    )
+    groups = image_index * num_classes + class_index
+    picked = batched_hard_nms(
+        box_probs, groups, iou_threshold=iou_threshold, top_k=top_k
+    )
+
+    results = []
+    for i in range(num_images):
+        image_picked = picked[image_index[picked] == i]
+        if image_picked.shape[0] == 0:
+            results.append((np.array([]), np.array([]), np.array([])))
             continue
-        subset_boxes = boxes[mask, :]
-        # print(subset_boxes)
-        box_probs = np.concatenate([subset_boxes, probs.reshape(-1, 1)], axis=1)
-        box_probs = hard_nms(
-            box_probs,
-            iou_threshold=iou_threshold,
-            top_k=top_k,
+        picked_box_probs = box_probs[image_picked]
+        picked_box_probs[:, 0] *= widths[i]
+        picked_box_probs[:, 1] *= heights[i]
+        picked_box_probs[:, 2] *= widths[i]
+        picked_box_probs[:, 3] *= heights[i]
+        results.append(
+            (
+                picked_box_probs[:, :4].astype(np.int32),
+                class_index[image_picked],
+                picked_box_probs[:, 4],
+            )
         )
-        picked_box_probs.append(box_probs)
-        picked_labels.extend([class_index] * box_probs.shape[0])
-    if not picked_box_probs:
-        return np.array([]), np.array([]), np.array([])
-    picked_box_probs = np.concatenate(picked_box_probs)
-    picked_box_probs[:, 0] *= width
-    picked_box_probs[:, 1] *= height
-    picked_box_probs[:, 2] *= width
-    picked_box_probs[:, 3] *= height
-    return (
-        picked_box_probs[:, :4].astype(np.int32),
-        np.array(picked_labels),
-        picked_box_probs[:, 4],
-    )
+    return results
@@ -3,19 +3,18 @@ from rb.api.models import (
     DirectoryInput,
     InputSchema,
     InputType,
+    IntRangeDescriptor,
+    ParameterSchema,
+    RangedIntParameterDescriptor,
     TaskSchema,
     ResponseBody,
     TextResponse,
 )
 from typing import TypedDict
-from age_and_gender_detection.model import AgeGenderDetector
 from pathlib import Path
 import logging
 import json
 import typer
-import onnxruntime
-
-onnxruntime.set_default_logger_severity(3)
 
 APP_NAME = "age-gender"
 
@@ -34,7 +33,25 @@ def task_schema() -> TaskSchema:
         label="Path to the directory containing all the images",
         input_type=InputType.DIRECTORY,
     )
-    return TaskSchema(inputs=[input_schema], parameters=[])
+    batch_size_schema = ParameterSchema(
+        key="batch_size",
+        label="Batch size",
+        subtitle="Number of images to run through the face detector and classifiers at once",
+        value=RangedIntParameterDescriptor(
+            range=IntRangeDescriptor(min=1, max=64), default=8
+        ),
+    )
+    num_workers_schema = ParameterSchema(
+        key="num_workers",
+        label="Number of workers",
+        subtitle="Number of threads used to decode images",
+        value=RangedIntParameterDescriptor(
+            range=IntRangeDescriptor(min=1, max=32), default=4
+        ),
+    )
+    return TaskSchema(
+        inputs=[input_schema], parameters=[batch_size_schema, num_workers_schema]
+    )
 
 
 # Specify the input and output types for the task
@@ -43,7 +60,8 @@ class Inputs(TypedDict):
 
 
 class Parameters(TypedDict):
-    pass
+    batch_size: int
+    num_workers: int
 
 
 server = MLService(APP_NAME)
@@ -55,17 +73,32 @@ server.add_app_metadata(
     info="Model to classify the age and gender of all faces in an image.",
 )
 models_dir = Path("src/age_and_gender_detection/models")
-model = AgeGenderDetector(
-    face_detector_path=models_dir / "version-RFB-640.onnx",
-    age_classifier_path=models_dir / "age_googlenet.onnx",
-    gender_classifier_path=models_dir / "gender_googlenet.onnx",
-)
 
 
-def predict(inputs: Inputs) -> ResponseBody:
+def load_model():
+    # onnxruntime and cv2 are only imported once the model is needed
+    import onnxruntime
+    from age_and_gender_detection.model import AgeGenderDetector
+
+    onnxruntime.set_default_logger_severity(3)
+    return AgeGenderDetector(
+        face_detector_path=models_dir / "version-RFB-640.onnx",
+        age_classifier_path=models_dir / "age_googlenet.onnx",
+        gender_classifier_path=models_dir / "gender_googlenet.onnx",
+    )
+
+
+model = server.add_model("age_gender_detector", load_model)
+
+
+def predict(inputs: Inputs, parameters: Parameters) -> ResponseBody:
     input_path = inputs["image_directory"].path
     logger.info(f"Input path: {input_path}")
-    res_list = model.predict_age_and_gender_on_dir(input_path)
+    res_list = model.get().predict_age_and_gender_on_dir(
+        input_path,
+        batch_size=parameters["batch_size"],
+        num_workers=parameters["num_workers"],
+    )
     logger.info(f"Response: {res_list}")
     response = TextResponse(value=json.dumps(res_list))
     return ResponseBody(root=response)
@@ -87,10 +120,20 @@ def cli_parser(path: str):
         return typer.Abort()
 
 
+def parameters_cli_parser(params: str) -> Parameters:
+    batch_size, num_workers = params.split(",")
+    return Parameters(batch_size=int(batch_size), num_workers=int(num_workers))
+
+
 server.add_ml_service(
     rule="/predict",
     ml_function=predict,
     inputs_cli_parser=typer.Argument(parser=cli_parser, help="Image directory path"),
+    parameters_cli_parser=typer.Argument(
+        "8,4",
+        parser=parameters_cli_parser,
+        help="Batch size and number of workers, comma separated (eg: 8,4)",
+    ),
     short_title="Age and Gender Classifier",
     order=0,
     task_schema_func=task_schema,
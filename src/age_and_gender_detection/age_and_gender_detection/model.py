@@ -3,10 +3,17 @@
 import cv2
 import onnxruntime as ort
 import argparse
+import logging
 import numpy as np
-from pathlib import Path
-from age_and_gender_detection.box_utils import predict
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from age_and_gender_detection.box_utils import predict_batch
+from age_and_gender_detection.preprocessing import preprocess_faces, preprocess_images
 from pprint import pprint
+from rb.lib.files import iter_files
+from rb.lib.progress import report_progress
+
+logger = logging.getLogger(__name__)
 
 
 # scale current rectangle to box
@@ -27,10 +34,52 @@ def cropImage(image, box):
     return num
 
 
+def run_session(session, batch, max_batch_size=32):
+    """
+    Run an ONNX session on an NCHW batch and return all of its outputs.
+    Models exported with a fixed batch dimension are fed in slices of that
+    size, so callers can always pass the whole batch.
+    """
+    model_input = session.get_inputs()[0]
+    batch_dim = model_input.shape[0]
+    step = batch_dim if isinstance(batch_dim, int) else max_batch_size
+    outputs = [
+        session.run(None, {model_input.name: batch[i : i + step]})
+        for i in range(0, batch.shape[0], step)
+    ]
+    return [np.concatenate(output, axis=0) for output in zip(*outputs)]
+
+
+def read_images(image_files, num_workers=4, prefetch=16):
+    """
+    Decode images in a thread pool, yielding (path, image) pairs in order.
+    At most `prefetch` images are decoded ahead of the consumer.
+    """
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        pending = deque()
+        for image_file in image_files:
+            pending.append((image_file, executor.submit(cv2.imread, str(image_file))))
+            if len(pending) >= prefetch:
+                image_file, future = pending.popleft()
+                yield image_file, future.result()
+        while pending:
+            image_file, future = pending.popleft()
+            yield image_file, future.result()
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
 def get_images_from_dir(image_dir, image_file_extensions):
-    image_dir = Path(image_dir)
-    image_files = [f for f in image_dir.iterdir() if f.suffix in image_file_extensions]
-    return image_files
+    return list(iter_files(image_dir, image_file_extensions, max_depth=0))
 
 
 class AgeGenderDetector:
@@ -39,6 +88,7 @@ class AgeGenderDetector:
         face_detector_path="models/version-RFB-640.onnx",
         age_classifier_path="models/age_googlenet.onnx",
         gender_classifier_path="models/gender_googlenet.onnx",
+        max_batch_size=32,
     ):
         self.ageList = [
             "(0-2)",
@@ -53,6 +103,7 @@ class AgeGenderDetector:
         self.runtime_providers = ["CUDAExecutionProvider", "CPUExecutionProvider"]
         self.genderList = ["Male", "Female"]
         self.image_file_extensions = [".jpg", ".jpeg", ".png", ".bmp", ".tiff"]
+        self.max_batch_size = max_batch_size
 
         self.face_detector_path = face_detector_path
         self.age_classifier_path = age_classifier_path
@@ -69,74 +120,113 @@ class AgeGenderDetector:
         )
 
     def faceDetector(self, orig_image, threshold=0.7):
-        image = cv2.cvtColor(orig_image, cv2.COLOR_BGR2RGB)
-        image = cv2.resize(image, (640, 480))
-        image_mean = np.array([127, 127, 127])
-        image = (image - image_mean) / 128
-        image = np.transpose(image, [2, 0, 1])
-        image = np.expand_dims(image, axis=0)
-        image = image.astype(np.float32)
-
-        input_name = self.face_detector.get_inputs()[0].name
-        confidences, boxes = self.face_detector.run(None, {input_name: image})
-        boxes, labels, probs = predict(
-            orig_image.shape[1], orig_image.shape[0], confidences, boxes, threshold
+        return self.detect_faces([orig_image], threshold)[0]
+
+    def detect_faces(self, orig_images, threshold=0.7):
+        """
+        Detect faces in a list of images with one batched detector call.
+        Returns:
+            a list of (boxes, labels, probs) tuples, one per image
+        """
+        batch = preprocess_images(orig_images)
+        confidences, boxes = run_session(self.face_detector, batch, self.max_batch_size)
+        return predict_batch(
+            [orig_image.shape[1] for orig_image in orig_images],
+            [orig_image.shape[0] for orig_image in orig_images],
+            confidences,
+            boxes,
+            threshold,
         )
-        return boxes, labels, probs
 
     def genderClassifier(self, orig_image):
-        image = cv2.cvtColor(orig_image, cv2.COLOR_BGR2RGB)
-        image = cv2.resize(image, (224, 224))
-        image_mean = np.array([104, 117, 123])
-        image = image - image_mean
-        image = np.transpose(image, [2, 0, 1])
-        image = np.expand_dims(image, axis=0)
-        image = image.astype(np.float32)
-
-        input_name = self.gender_classifier.get_inputs()[0].name
-        genders = self.gender_classifier.run(None, {input_name: image})
-        gender = self.genderList[genders[0].argmax()]
-        return gender
+        return self.classify_faces([orig_image])[0][0]
 
     def ageClassifier(self, orig_image):
-        image = cv2.cvtColor(orig_image, cv2.COLOR_BGR2RGB)
-        image = cv2.resize(image, (224, 224))
-        image_mean = np.array([104, 117, 123])
-        image = image - image_mean
-        image = np.transpose(image, [2, 0, 1])
-        image = np.expand_dims(image, axis=0)
-        image = image.astype(np.float32)
-
-        input_name = self.age_classifier.get_inputs()[0].name
-        ages = self.age_classifier.run(None, {input_name: image})
-        age = self.ageList[ages[0].argmax()]
-        return age
+        return self.classify_faces([orig_image])[1][0]
+
+    def classify_faces(self, crops):
+        """
+        Classify the gender and age of a list of face crops.
+        All crops are stacked into one NCHW batch so each classifier runs
+        once per call instead of once per face.
+        Returns:
+            genders (N): a list of gender labels
+            ages (N): a list of age labels
+        """
+        if len(crops) == 0:
+            return [], []
+        batch = preprocess_faces(crops)
+        genders = run_session(self.gender_classifier, batch, self.max_batch_size)[0]
+        ages = run_session(self.age_classifier, batch, self.max_batch_size)[0]
+        genders = genders.reshape(len(crops), -1).argmax(axis=1)
+        ages = ages.reshape(len(crops), -1).argmax(axis=1)
+        return (
+            [self.genderList[i] for i in genders],
+            [self.ageList[i] for i in ages],
+        )
 
     def predict_age_and_gender(self, image_path):
-        orig_image = cv2.imread(image_path)
-        boxes, labels, probs = self.faceDetector(orig_image)
+        orig_image = cv2.imread(str(image_path))
+        return self.predict_age_and_gender_on_images([orig_image])[0]
+
+    def predict_age_and_gender_on_images(self, orig_images):
+        """
+        Predict age and gender for every face in a list of decoded images.
+        Face detection runs once for the whole list and classification runs
+        once for all faces found across the list.
+        """
+        detections = self.detect_faces(orig_images)
+
+        image_boxes = []
+        crops = []
+        for orig_image, (boxes, _, _) in zip(orig_images, detections):
+            scaled_boxes = [scale(boxes[i, :]) for i in range(boxes.shape[0])]
+            image_boxes.append(scaled_boxes)
+            crops.extend(cropImage(orig_image, box) for box in scaled_boxes)
+        genders, ages = self.classify_faces(crops)
 
         preds = []
-        for i in range(boxes.shape[0]):
-            box = scale(boxes[i, :])
-            cropped = cropImage(orig_image, box)
-            gender = self.genderClassifier(cropped)
-            age = self.ageClassifier(cropped)
-            preds.append(
-                {
-                    "box": [int(e) for e in box],
-                    "gender": gender,
-                    "age": age,
-                }
-            )
+        face_index = 0
+        for scaled_boxes in image_boxes:
+            image_preds = []
+            for box in scaled_boxes:
+                image_preds.append(
+                    {
+                        "box": [int(e) for e in box],
+                        "gender": genders[face_index],
+                        "age": ages[face_index],
+                    }
+                )
+                face_index += 1
+            preds.append(image_preds)
         return preds
 
-    def predict_age_and_gender_on_dir(self, image_dir):
+    def predict_age_and_gender_on_dir(self, image_dir, batch_size=8, num_workers=4):
+        """
+        Predict age and gender for every image in a directory.
+        Images are decoded in a pool of `num_workers` threads and processed
+        `batch_size` images at a time.
+        """
         image_files = get_images_from_dir(image_dir, self.image_file_extensions)
         preds = {}
-        for image_file in image_files:
-            pred = self.predict_age_and_gender(image_file)
-            preds[str(image_file)] = pred
+        images = read_images(image_files, num_workers, prefetch=2 * batch_size)
+        for chunk in chunked(images, batch_size):
+            readable = []
+            for image_file, orig_image in chunk:
+                if orig_image is None:
+                    logger.warning(f"Could not read image: {image_file}")
+                    preds[str(image_file)] = []
+                else:
+                    readable.append((image_file, orig_image))
+            if not readable:
+                report_progress(len(preds) / len(image_files))
+                continue
+            chunk_preds = self.predict_age_and_gender_on_images(
+                [orig_image for _, orig_image in readable]
+            )
+            for (image_file, _), pred in zip(readable, chunk_preds):
+                preds[str(image_file)] = pred
+            report_progress(len(preds) / len(image_files), f"Processed {image_file}")
         return preds
 
 
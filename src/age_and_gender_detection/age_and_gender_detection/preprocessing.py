@@ -0,0 +1,54 @@
+# SPDX-License-Identifier: Apache-2.0
+
+import cv2
+import numpy as np
+
+DETECTOR_SIZE = (640, 480)
+DETECTOR_MEAN = np.array([127, 127, 127], dtype=np.float32).reshape(3, 1, 1)
+DETECTOR_SCALE = np.float32(1 / 128)
+
+CLASSIFIER_SIZE = (224, 224)
+CLASSIFIER_MEAN = np.array([104, 117, 123], dtype=np.float32).reshape(3, 1, 1)
+
+
+def preprocess_into(image, out, size, mean, scale=None):
+    """
+    Resize a BGR image and write it into `out` as a mean-subtracted RGB
+    CHW float32 array. The channel swap and transpose are views, so the
+    only full-size copy is the write into `out`.
+    Args:
+        image (H, W, 3): BGR uint8 image.
+        out (3, size[1], size[0]): float32 buffer to write into.
+        size: (width, height) to resize to.
+        mean (3, 1, 1): per-channel mean in RGB order.
+        scale: optional factor applied after mean subtraction.
+    Returns:
+        out
+    """
+    resized = cv2.resize(image, size)
+    np.subtract(resized[:, :, ::-1].transpose(2, 0, 1), mean, out=out)
+    if scale is not None:
+        out *= scale
+    return out
+
+
+def preprocess_batch(images, size, mean, scale=None, out=None):
+    """
+    Preprocess a list of BGR images into one NCHW float32 batch.
+    Pass `out` to reuse a buffer of at least len(images) rows.
+    """
+    if out is None:
+        out = np.empty((len(images), 3, size[1], size[0]), dtype=np.float32)
+    for i, image in enumerate(images):
+        preprocess_into(image, out[i], size, mean, scale)
+    return out[: len(images)]
+
+
+def preprocess_images(images, out=None):
+    """Preprocess full images for the face detector."""
+    return preprocess_batch(images, DETECTOR_SIZE, DETECTOR_MEAN, DETECTOR_SCALE, out)
+
+
+def preprocess_faces(crops, out=None):
+    """Preprocess face crops once for both the age and gender classifiers."""
+    return preprocess_batch(crops, CLASSIFIER_SIZE, CLASSIFIER_MEAN, out=out)
@@ -0,0 +1,63 @@
+"""
+Compare peak memory and time of batched NMS over a batch of detector outputs
+against running it one image at a time.
+
+Run from the repository root:
+    python src/age_and_gender_detection/scripts/benchmark_nms.py
+"""
+
+import time
+import tracemalloc
+
+import numpy as np
+from age_and_gender_detection.box_utils import predict, predict_batch
+
+# anchors of the face detector's output
+NUM_BOXES = 17640
+BATCH_SIZES = [1, 8, 32, 64]
+WIDTH, HEIGHT = 640, 480
+THRESHOLD = 0.7
+
+
+def random_detections(rng, num_images):
+    left_top = rng.random((num_images, NUM_BOXES, 2), dtype=np.float32) * 0.8
+    size = rng.random((num_images, NUM_BOXES, 2), dtype=np.float32) * 0.2 + 0.01
+    boxes = np.concatenate([left_top, left_top + size], axis=2)
+    confidences = rng.random((num_images, NUM_BOXES, 2), dtype=np.float32)
+    return confidences, boxes
+
+
+def per_image(confidences, boxes):
+    for i in range(len(confidences)):
+        predict(WIDTH, HEIGHT, confidences[i : i + 1], boxes[i : i + 1], THRESHOLD)
+
+
+def batched(confidences, boxes):
+    n = len(confidences)
+    predict_batch([WIDTH] * n, [HEIGHT] * n, confidences, boxes, THRESHOLD)
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(*args)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, seconds
+
+
+def main():
+    rng = np.random.default_rng(0)
+    for batch_size in BATCH_SIZES:
+        confidences, boxes = random_detections(rng, batch_size)
+        for name, func in [("per image", per_image), ("batched", batched)]:
+            peak, seconds = measure(func, confidences, boxes)
+            print(
+                f"batch {batch_size:>3} {name:>9}: peak {peak / 2**20:8.1f} MiB, "
+                f"{seconds * 1000:8.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
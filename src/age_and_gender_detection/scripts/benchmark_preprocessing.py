@@ -0,0 +1,72 @@
+"""
+Compare allocations and time per face for the legacy per-classifier
+preprocessing against the shared float32 preprocessing module.
+
+Run from the repository root:
+    python src/age_and_gender_detection/scripts/benchmark_preprocessing.py
+"""
+
+import timeit
+import tracemalloc
+
+import cv2
+import numpy as np
+from age_and_gender_detection.preprocessing import preprocess_faces
+
+NUM_FACES = 32
+REPEAT = 20
+
+
+def legacy_classifier_input(orig_image):
+    image = cv2.cvtColor(orig_image, cv2.COLOR_BGR2RGB)
+    image = cv2.resize(image, (224, 224))
+    image_mean = np.array([104, 117, 123])
+    image = image - image_mean
+    image = np.transpose(image, [2, 0, 1])
+    image = np.expand_dims(image, axis=0)
+    image = image.astype(np.float32)
+    return image
+
+
+def legacy(crops):
+    # the gender and age classifiers each preprocessed the same crop
+    for crop in crops:
+        legacy_classifier_input(crop)
+        legacy_classifier_input(crop)
+
+
+def shared(crops, buffer):
+    preprocess_faces(crops, out=buffer)
+
+
+def measure(func, crops, *args):
+    # peak temporary memory while preprocessing a single face
+    tracemalloc.start()
+    func(crops[:1], *args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    seconds = min(timeit.repeat(lambda: func(crops, *args), number=1, repeat=REPEAT))
+    return peak, seconds
+
+
+def main():
+    rng = np.random.default_rng(0)
+    crops = [
+        rng.integers(0, 256, size=(rng.integers(80, 400), 200, 3), dtype=np.uint8)
+        for _ in range(NUM_FACES)
+    ]
+    buffer = np.empty((NUM_FACES, 3, 224, 224), dtype=np.float32)
+
+    for name, func, args in [
+        ("legacy", legacy, ()),
+        ("shared", shared, (buffer,)),
+    ]:
+        peak, seconds = measure(func, crops, *args)
+        print(
+            f"{name:>7}: peak {peak / 1024:8.1f} KiB/face, "
+            f"{seconds / NUM_FACES * 1e6:8.1f} us/face"
+        )
+
+
+if __name__ == "__main__":
+    main()
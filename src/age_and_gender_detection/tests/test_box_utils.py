@@ -0,0 +1,132 @@
+import numpy as np
+from age_and_gender_detection.box_utils import (
+    batched_hard_nms,
+    hard_nms,
+    iou_of,
+    predict,
+    predict_batch,
+)
+
+
+def legacy_hard_nms(box_scores, iou_threshold, top_k=-1, candidate_size=200):
+    scores = box_scores[:, -1]
+    boxes = box_scores[:, :-1]
+    picked = []
+    indexes = np.argsort(scores)
+    indexes = indexes[-candidate_size:]
+    while len(indexes) > 0:
+        current = indexes[-1]
+        picked.append(current)
+        if 0 < top_k == len(picked) or len(indexes) == 1:
+            break
+        current_box = boxes[current, :]
+        indexes = indexes[:-1]
+        rest_boxes = boxes[indexes, :]
+        iou = iou_of(rest_boxes, np.expand_dims(current_box, axis=0))
+        indexes = indexes[iou <= iou_threshold]
+    return box_scores[picked, :]
+
+
+def legacy_predict(width, height, confidences, boxes, prob_threshold, top_k=-1):
+    boxes = boxes[0]
+    confidences = confidences[0]
+    picked_box_probs = []
+    picked_labels = []
+    for class_index in range(1, confidences.shape[1]):
+        probs = confidences[:, class_index]
+        mask = probs > prob_threshold
+        probs = probs[mask]
+        if probs.shape[0] == 0:
+            continue
+        subset_boxes = boxes[mask, :]
+        box_probs = np.concatenate([subset_boxes, probs.reshape(-1, 1)], axis=1)
+        box_probs = legacy_hard_nms(box_probs, iou_threshold=0.5, top_k=top_k)
+        picked_box_probs.append(box_probs)
+        picked_labels.extend([class_index] * box_probs.shape[0])
+    if not picked_box_probs:
+        return np.array([]), np.array([]), np.array([])
+    picked_box_probs = np.concatenate(picked_box_probs)
+    picked_box_probs[:, 0] *= width
+    picked_box_probs[:, 1] *= height
+    picked_box_probs[:, 2] *= width
+    picked_box_probs[:, 3] *= height
+    return (
+        picked_box_probs[:, :4].astype(np.int32),
+        np.array(picked_labels),
+        picked_box_probs[:, 4],
+    )
+
+
+def random_detections(rng, num_images, num_boxes, num_classes):
+    left_top = rng.random((num_images, num_boxes, 2), dtype=np.float32) * 0.8
+    size = rng.random((num_images, num_boxes, 2), dtype=np.float32) * 0.2 + 0.01
+    boxes = np.concatenate([left_top, left_top + size], axis=2)
+    confidences = rng.random((num_images, num_boxes, num_classes), dtype=np.float32)
+    return confidences, boxes
+
+
+def test_hard_nms_matches_legacy():
+    rng = np.random.default_rng(0)
+    for top_k in [-1, 1, 5]:
+        for candidate_size in [10, 200]:
+            confidences, boxes = random_detections(rng, 1, 300, 2)
+            box_scores = np.concatenate([boxes[0], confidences[0, :, 1:]], axis=1)
+            expected = legacy_hard_nms(box_scores, 0.3, top_k, candidate_size)
+            result = hard_nms(box_scores, 0.3, top_k, candidate_size)
+            np.testing.assert_array_equal(result, expected)
+
+
+def test_hard_nms_empty():
+    result = hard_nms(np.zeros((0, 5), dtype=np.float32), 0.5)
+    assert result.shape == (0, 5)
+
+
+def test_batched_hard_nms_matches_per_group():
+    rng = np.random.default_rng(1)
+    confidences, boxes = random_detections(rng, 1, 400, 2)
+    box_scores = np.concatenate([boxes[0], confidences[0, :, 1:]], axis=1)
+    groups = rng.integers(0, 4, size=len(box_scores))
+    picked = batched_hard_nms(box_scores, groups, 0.3, top_k=3, candidate_size=50)
+    for group in range(4):
+        expected = legacy_hard_nms(box_scores[groups == group], 0.3, 3, 50)
+        np.testing.assert_array_equal(
+            box_scores[picked[groups[picked] == group]], expected
+        )
+
+
+def test_predict_matches_legacy():
+    rng = np.random.default_rng(2)
+    for num_classes in [2, 3]:
+        confidences, boxes = random_detections(rng, 1, 500, num_classes)
+        expected = legacy_predict(640, 480, confidences, boxes, 0.7)
+        result = predict(640, 480, confidences, boxes, 0.7)
+        for r, e in zip(result, expected):
+            np.testing.assert_array_equal(r, e)
+
+
+def test_predict_batch_matches_predict():
+    rng = np.random.default_rng(3)
+    confidences, boxes = random_detections(rng, 4, 500, 2)
+    confidences[2] = 0  # an image without detections
+    widths, heights = [640, 320, 800, 1024], [480, 240, 600, 768]
+    results = predict_batch(widths, heights, confidences, boxes, 0.7)
+    assert len(results) == 4
+    for i, result in enumerate(results):
+        expected = legacy_predict(
+            widths[i], heights[i], confidences[i : i + 1], boxes[i : i + 1], 0.7
+        )
+        for r, e in zip(result, expected):
+            np.testing.assert_array_equal(r, e)
+
+
+def test_predict_batch_matches_predict_at_detector_size():
+    # the detector's 17640 anchors, with many boxes above the threshold in
+    # every image
+    rng = np.random.default_rng(4)
+    confidences, boxes = random_detections(rng, 8, 17640, 2)
+    results = predict_batch([640] * 8, [480] * 8, confidences, boxes, 0.7)
+    assert len(results) == 8
+    for i, result in enumerate(results):
+        expected = predict(640, 480, confidences[i : i + 1], boxes[i : i + 1], 0.7)
+        for r, e in zip(result, expected):
+            np.testing.assert_array_equal(r, e)
@@ -1,11 +1,12 @@
 from age_and_gender_detection.main import app as cli_app, APP_NAME, task_schema
-from age_and_gender_detection.model import AgeGenderDetector
+from age_and_gender_detection.model import AgeGenderDetector, cropImage, scale
 from rb.lib.common_tests import RBAppTest
 from rb.api.models import AppMetadata
 from pathlib import Path
 from rb.api.models import ResponseBody
 import logging
 import json
+import cv2
 
 
 class DebugOnlyFilter(logging.Filter):
@@ -122,3 +123,22 @@ class TestAgeGender(RBAppTest):
             assert v.keys() == preds[k][0].keys()
             assert v["gender"] == preds[k][0]["gender"]
             assert v["age"] == preds[k][0]["age"]
+
+    def test_predict_age_gender_batch_sizes_agree(self):
+        single = self.model.predict_age_and_gender_on_dir(
+            TEST_IMAGES_DIR, batch_size=1, num_workers=1
+        )
+        batched = self.model.predict_age_and_gender_on_dir(
+            TEST_IMAGES_DIR, batch_size=3, num_workers=2
+        )
+        assert single == batched
+
+    def test_classify_faces_batched_matches_single(self):
+        image = cv2.imread(str(TEST_IMAGES_DIR / "bella.jpg"))
+        boxes, _, _ = self.model.faceDetector(image)
+        crops = [cropImage(image, scale(box)) for box in boxes] * 3
+        genders, ages = self.model.classify_faces(crops)
+        assert len(genders) == len(ages) == len(crops)
+        for crop, gender, age in zip(crops, genders, ages):
+            assert gender == self.model.genderClassifier(crop)
+            assert age == self.model.ageClassifier(crop)
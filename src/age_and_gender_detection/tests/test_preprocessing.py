@@ -0,0 +1,46 @@
+from pathlib import Path
+
+import cv2
+import numpy as np
+from age_and_gender_detection.preprocessing import preprocess_faces, preprocess_images
+
+TEST_IMAGES_DIR = Path("src/age_and_gender_detection/test_images")
+
+
+def legacy_preprocess(orig_image, size, mean, scale=1):
+    image = cv2.cvtColor(orig_image, cv2.COLOR_BGR2RGB)
+    image = cv2.resize(image, size)
+    image = (image - np.array(mean)) / scale
+    image = np.transpose(image, [2, 0, 1])
+    return image.astype(np.float32)
+
+
+def load_test_images():
+    return [cv2.imread(str(path)) for path in sorted(TEST_IMAGES_DIR.glob("*.jpg"))]
+
+
+def test_preprocess_images_matches_legacy():
+    images = load_test_images()
+    batch = preprocess_images(images)
+    assert batch.dtype == np.float32
+    assert batch.shape == (len(images), 3, 480, 640)
+    for image, row in zip(images, batch):
+        expected = legacy_preprocess(image, (640, 480), [127, 127, 127], 128)
+        np.testing.assert_array_equal(row, expected)
+
+
+def test_preprocess_faces_matches_legacy():
+    crops = [image[50:300, 80:280] for image in load_test_images()]
+    batch = preprocess_faces(crops)
+    assert batch.shape == (len(crops), 3, 224, 224)
+    for crop, row in zip(crops, batch):
+        expected = legacy_preprocess(crop, (224, 224), [104, 117, 123])
+        np.testing.assert_array_equal(row, expected)
+
+
+def test_preprocess_faces_reuses_buffer():
+    crops = [image[50:300, 80:280] for image in load_test_images()]
+    buffer = np.empty((8, 3, 224, 224), dtype=np.float32)
+    batch = preprocess_faces(crops, out=buffer)
+    assert batch.shape[0] == len(crops)
+    assert np.shares_memory(batch, buffer)
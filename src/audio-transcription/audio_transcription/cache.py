@@ -0,0 +1,134 @@
+"""On-disk cache of transcripts keyed by audio content and whisper settings."""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Optional
+
+from audio_transcription.checkpoint import TranscriptCheckpoint
+
+logger = logging.getLogger(__name__)
+
+# Override with RESCUEBOX_TRANSCRIPTION_CACHE_DIR / RESCUEBOX_TRANSCRIPTION_CACHE_MB
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "rescuebox" / "audio-transcription"
+DEFAULT_CACHE_MB = 512
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path: str) -> str:
+    """sha256 of a file's contents, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(audio_path: str, model_name: str, options: dict) -> str:
+    """
+    Key a transcript by what was transcribed and how: the audio content, the
+    whisper model and the transcribe options. Renaming or moving a file keeps
+    its key, changing the model or options does not.
+    """
+    key = json.dumps(
+        {"audio": file_digest(audio_path), "model": model_name, "options": options},
+        sort_keys=True,
+    )
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class TranscriptionCache:
+    """
+    A sqlite backed transcript cache. Once the stored transcripts exceed
+    max_bytes the least recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.db_path = self.cache_dir / "transcripts.sqlite3"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS transcripts ("
+                "key TEXT PRIMARY KEY, text TEXT NOT NULL, size INTEGER NOT NULL, "
+                "last_access REAL NOT NULL)"
+            )
+
+    @classmethod
+    def default(cls) -> "TranscriptionCache":
+        cache_dir = os.environ.get(
+            "RESCUEBOX_TRANSCRIPTION_CACHE_DIR", DEFAULT_CACHE_DIR
+        )
+        max_mb = float(
+            os.environ.get("RESCUEBOX_TRANSCRIPTION_CACHE_MB", DEFAULT_CACHE_MB)
+        )
+        return cls(Path(cache_dir), int(max_mb * 1024 * 1024))
+
+    def _connect(self) -> "closing[sqlite3.Connection]":
+        # a connection per call keeps the cache usable from worker threads
+        return closing(sqlite3.connect(self.db_path, timeout=30))
+
+    def get(self, key: str) -> Optional[str]:
+        with self._connect() as conn, conn:
+            row = conn.execute(
+                "SELECT text FROM transcripts WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE transcripts SET last_access = ? WHERE key = ?",
+                (time.time(), key),
+            )
+        return row[0]
+
+    def put(self, key: str, text: str) -> None:
+        with self._connect() as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO transcripts VALUES (?, ?, ?, ?)",
+                (key, text, len(text.encode()), time.time()),
+            )
+        self.prune()
+
+    def checkpoint(self, key: str) -> TranscriptCheckpoint:
+        """Checkpoint for a transcript that is not in the cache yet."""
+        return TranscriptCheckpoint(self.cache_dir / "checkpoints" / f"{key}.jsonl")
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM transcripts"
+            ).fetchone()
+        return {
+            "path": str(self.db_path),
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+        }
+
+    def prune(self, max_bytes: Optional[int] = None) -> int:
+        """
+        Evict least recently used entries until the cache fits in max_bytes
+        (the cache limit by default). Returns the number of entries removed.
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        with self._connect() as conn, conn:
+            rows = conn.execute(
+                "SELECT key, size FROM transcripts ORDER BY last_access DESC"
+            ).fetchall()
+            total = 0
+            evicted = []
+            for key, size in rows:
+                total += size
+                if total > max_bytes:
+                    evicted.append((key,))
+            conn.executemany("DELETE FROM transcripts WHERE key = ?", evicted)
+        if evicted:
+            logger.info(f"Evicted {len(evicted)} cached transcripts")
+        return len(evicted)
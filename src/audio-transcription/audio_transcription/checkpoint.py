@@ -0,0 +1,86 @@
+"""Checkpoints that let an interrupted transcription resume where it stopped."""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+
+from audio_transcription.vad import previous_text, speech_windows, transcribe_window
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptCheckpoint:
+    """
+    The segments of a partly transcribed file, appended as a JSON line per
+    finished window of speech. Each line records the sample the window ended
+    at so a restart can skip every window up to it.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def load(self) -> tuple[int, list[dict]]:
+        """
+        Return the sample transcription reached and the segments so far. A
+        line left half written by a crash is cut off the file, so the next
+        append starts on a line of its own.
+        """
+        done_until, segments = 0, []
+        if not self.path.exists():
+            return done_until, segments
+        with open(self.path, "r+b") as f:
+            complete = 0
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("unterminated line")
+                    region = json.loads(line)
+                except ValueError:
+                    # the process died while writing this line
+                    logger.info(f"Dropping a partly written line of {self.path}")
+                    f.truncate(complete)
+                    break
+                complete += len(line)
+                done_until = region["end"]
+                segments.extend(region["segments"])
+        return done_until, segments
+
+    def append(self, region_end: int, segments: list[dict]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(json.dumps({"end": region_end, "segments": segments}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def remove(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+def iter_transcribe_resumable(
+    whisper_model,
+    audio: np.ndarray,
+    options: dict,
+    use_vad: bool,
+    checkpoint: TranscriptCheckpoint,
+) -> Iterator[dict]:
+    """
+    Like vad.iter_transcribe_segments, but replays the segments already in
+    the checkpoint and records each newly transcribed window in it.
+    """
+    done_until, segments = checkpoint.load()
+    if done_until:
+        logger.info(f"Resuming transcription from {checkpoint.path}")
+    yield from segments
+    for window in speech_windows(audio, use_vad):
+        window_end = window[-1][1]
+        if window_end <= done_until:
+            continue
+        segments = transcribe_window(
+            whisper_model, audio, window, options, previous_text(segments)
+        )
+        checkpoint.append(window_end, segments)
+        yield from segments
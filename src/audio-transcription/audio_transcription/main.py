@@ -1,21 +1,24 @@
 """audio transcribe plugin"""
 
 import logging
-from typing import List, TypedDict
+from typing import Annotated, Iterator, List, Optional, TypedDict
 
 from pydantic import DirectoryPath
 import typer
 from rb.api.models import (
     BatchTextResponse,
-    DirectoryInput,
     FileFilterDirectory,
     InputSchema,
     InputType,
+    IntRangeDescriptor,
+    ParameterSchema,
+    RangedIntParameterDescriptor,
     ResponseBody,
     TextResponse,
     TaskSchema,
 )
-from audio_transcription.model import AudioTranscriptionModel
+from audio_transcription.cache import TranscriptionCache
+from audio_transcription.model import AUDIO_EXTENSIONS, AudioTranscriptionModel
 from rb.lib.ml_service import MLService
 
 logger = logging.getLogger(__name__)
@@ -35,39 +38,73 @@ ml_service.add_app_metadata(
     info="A parser for transcribing audio files.",
 )
 
-model = AudioTranscriptionModel()
 
-AUDIO_EXTENSIONS = {".mp3", ".wav", ".flac", ".aac"}
+model = ml_service.add_model(
+    "whisper", AudioTranscriptionModel, warmup=AudioTranscriptionModel.warmup
+)
 
 
 class AudioDirectory(FileFilterDirectory):
 
     path: DirectoryPath
     file_extensions: List[str] = AUDIO_EXTENSIONS
+    # audio files are also picked up from subdirectories
+    max_depth: Optional[int] = None
 
 
 class AudioInput(TypedDict):
     input_dir: AudioDirectory
 
 
+class AudioParameters(TypedDict):
+    num_workers: int
+
+
 def task_schema() -> TaskSchema:
     input_schema = InputSchema(
         key="input_dir",
         label="Provide audio files directory",
         input_type=InputType.DIRECTORY,
     )
-    return TaskSchema(inputs=[input_schema], parameters=[])
+    num_workers_schema = ParameterSchema(
+        key="num_workers",
+        label="Number of workers",
+        subtitle="Number of processes transcribing files in parallel, each with its own model",
+        value=RangedIntParameterDescriptor(
+            range=IntRangeDescriptor(min=1, max=32), default=1
+        ),
+    )
+    return TaskSchema(inputs=[input_schema], parameters=[num_workers_schema])
+
+
+def format_timestamp(seconds: float) -> str:
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(int(minutes), 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:05.2f}"
 
 
-def transcribe(inputs: AudioInput) -> ResponseBody:
+def format_segments(segments: list[dict]) -> str:
+    """One line per whisper segment, prefixed with its start and end time"""
+    return "\n".join(
+        f"[{format_timestamp(s['start'])} - {format_timestamp(s['end'])}] "
+        f"{s['text'].strip()}"
+        for s in segments
+    )
+
+
+def transcribe(inputs: AudioInput, parameters: AudioParameters) -> ResponseBody:
     """Transcribe audio files"""
 
     print("Processing transcription...")
-    dirpath = inputs["input_dir"].path
+    # found while validating the input, so the directory is not walked again
+    audio_files = inputs["input_dir"].matching_files()
 
-    results = model.transcribe_files_in_directory(dirpath)
+    results = model.get().transcribe_batch(
+        audio_files, num_workers=parameters["num_workers"]
+    )
     result_texts = [
-        TextResponse(value=r["result"], title=r["file_path"]) for r in results
+        TextResponse(value=format_segments(r["segments"]), title=r["file_path"])
+        for r in results
     ]
 
     print(f"Transcription Results: {results}")
@@ -75,27 +112,77 @@ def transcribe(inputs: AudioInput) -> ResponseBody:
     return ResponseBody(root=response)
 
 
+def transcribe_streaming(
+    inputs: AudioInput, parameters: AudioParameters
+) -> Iterator[TextResponse]:
+    """Transcribe audio files, yielding each file's transcript when it is done"""
+
+    audio_files = inputs["input_dir"].matching_files()
+    for r in model.get().iter_transcribe_batch(
+        audio_files, num_workers=parameters["num_workers"]
+    ):
+        yield TextResponse(value=format_segments(r["segments"]), title=r["file_path"])
+
+
 def cli_parser(path: str):
     """
     Parses CLI input path into a Pydantic object.
     """
     try:
         logger.debug(f"Parsing CLI input path: {path}")
-        return AudioInput(input_dir=DirectoryInput(path=path))
+        return AudioInput(input_dir=AudioDirectory(path=path))
     except Exception as e:
         logger.error(f"Error parsing CLI input: {e}")
         raise typer.Abort()
 
 
+def parameters_cli_parser(num_workers: str) -> AudioParameters:
+    return AudioParameters(num_workers=int(num_workers))
+
+
 ml_service.add_ml_service(
     rule="/transcribe",
     ml_function=transcribe,
     inputs_cli_parser=typer.Argument(parser=cli_parser, help="Input directory path"),
+    parameters_cli_parser=typer.Argument(
+        "1",
+        parser=parameters_cli_parser,
+        help="Number of transcription worker processes (eg: 4)",
+    ),
     task_schema_func=task_schema,
     short_title="Transcribe audio files",
     order=0,
+    streaming_ml_function=transcribe_streaming,
 )
 
+
+@ml_service.app.command(f"/{APP_NAME}/cache")
+def transcription_cache(
+    prune: Annotated[
+        bool, typer.Option(help="Evict least recently used transcripts")
+    ] = False,
+    max_size_mb: Annotated[
+        Optional[float],
+        typer.Option(help="Size to prune down to, defaults to the cache limit"),
+    ] = None,
+) -> str:
+    """
+    Show the size of the transcription cache and optionally prune it
+    """
+    cache = TranscriptionCache.default()
+    if prune:
+        max_bytes = None if max_size_mb is None else int(max_size_mb * 1024 * 1024)
+        print(f"Pruned {cache.prune(max_bytes)} transcripts")
+    stats = cache.stats()
+    res = (
+        f"{stats['entries']} cached transcripts, "
+        f"{stats['size_bytes'] / 1024 / 1024:.2f} MB of "
+        f"{stats['max_bytes'] / 1024 / 1024:.2f} MB ({stats['path']})"
+    )
+    print(res)
+    return res
+
+
 app = ml_service.app
 if __name__ == "__main__":
     app()
@@ -1,44 +1,187 @@
+import json
+import threading
 from pathlib import Path
+from typing import Iterator, Optional
 
-import whisper
+from audio_transcription.cache import TranscriptionCache, cache_key
+from audio_transcription.parallel import TranscriptionPool
+from audio_transcription.checkpoint import iter_transcribe_resumable
+from rb.lib.files import iter_files
+from rb.lib.progress import report_progress
+from rb.lib.whisper_models import SharedWhisperModel
 
+AUDIO_EXTENSIONS = [".mp3", ".wav", ".flac", ".aac", ".ogg", ".m4a"]
 
-class AudioTranscriptionModel:
-    def __init__(self, model_path: str = "base"):
-        self.model = whisper.load_model(model_path)
-        self.audio_extensions = {".mp3", ".wav", ".flac", ".aac", ".ogg", ".m4a"}
+# options passed to whisper's transcribe, part of the cache key
+TRANSCRIBE_OPTIONS = {"fp16": False}
+
+
+def segments_text(segments: list[dict]) -> str:
+    return "".join(segment["text"] for segment in segments)
+
+
+def file_result(file_path: str, segments: list[dict]) -> dict:
+    return {
+        "file_path": file_path,
+        "result": segments_text(segments),
+        "segments": segments,
+    }
 
-    def get_audio_files(self, directory: str) -> list[Path]:
-        audio_files = []
 
-        # Convert string path to Path object
-        directory_path = Path(directory)
+class AudioTranscriptionModel:
+    def __init__(
+        self,
+        model_path: str = "base",
+        cache: Optional[TranscriptionCache] = None,
+        use_vad: bool = True,
+    ):
+        self.model_path = model_path
+        # loaded on first use and shared with the other plugins in the process
+        self.model = SharedWhisperModel(model_path)
+        # only send the detected speech regions to whisper
+        self.use_vad = use_vad
+        self.cache = cache if cache is not None else TranscriptionCache.default()
+        # one pool per worker count, so a request never shuts down the pool
+        # another request is using
+        self._pools: dict[int, TranscriptionPool] = {}
+        self._pools_lock = threading.Lock()
+        self.audio_extensions = AUDIO_EXTENSIONS
 
-        # Iterate over files in directory and subdirectories
-        for file_path in directory_path.rglob("*"):
-            if file_path.suffix.lower() in self.audio_extensions:
-                audio_files.append(file_path)
+    def iter_audio_files(self, directory: str) -> Iterator[Path]:
+        """Lazily find audio files in a directory and its subdirectories."""
+        return iter_files(directory, self.audio_extensions)
 
-        return audio_files
+    def get_audio_files(self, directory: str) -> list[Path]:
+        return list(self.iter_audio_files(directory))
 
     def _validate_audio_path(self, audio_path: str) -> None:
         if audio_path is None:
             raise ValueError("audio_path cannot be None")
 
-    def transcribe(self, audio_path: str, out_dir: str = None) -> str:
+    def _cache_key(self, audio_path: str) -> str:
+        return cache_key(
+            str(audio_path),
+            self.model_path,
+            {**TRANSCRIBE_OPTIONS, "vad": self.use_vad, "output": "segments"},
+        )
+
+    def iter_transcribe_segments(self, audio_path: str) -> Iterator[dict]:
+        """
+        Yield timestamped segments of a file's speech as they are transcribed.
+        Progress is checkpointed after every window, so a transcription that
+        was interrupted picks up where it stopped.
+        """
+        import whisper
+
         self._validate_audio_path(audio_path)
-        res = self.model.transcribe(str(audio_path), fp16=False)["text"]
+        key = self._cache_key(audio_path)
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield from json.loads(cached)
+            return
+
+        audio = whisper.load_audio(str(audio_path))
+        checkpoint = self.cache.checkpoint(key)
+        segments = []
+        for segment in iter_transcribe_resumable(
+            self.model, audio, TRANSCRIBE_OPTIONS, self.use_vad, checkpoint
+        ):
+            segments.append(segment)
+            yield segment
+        self.cache.put(key, json.dumps(segments))
+        checkpoint.remove()
+
+    def transcribe_segments(self, audio_path: str) -> list[dict]:
+        return list(self.iter_transcribe_segments(audio_path))
+
+    def transcribe(self, audio_path: str, out_dir: str = None) -> str:
+        res = segments_text(self.transcribe_segments(audio_path))
         if out_dir:
             self._write_res_to_dir(
                 [{"file_path": str(audio_path), "result": res}], out_dir
             )
         return res
 
-    def transcribe_batch(self, audio_paths: list[str]) -> list[dict]:
-        return [
-            {"file_path": str(audio_path), "result": self.transcribe(audio_path)}
-            for audio_path in audio_paths
-        ]
+    def _get_pool(self, num_workers: int) -> TranscriptionPool:
+        with self._pools_lock:
+            pool = self._pools.get(num_workers)
+            if pool is None:
+                pool = TranscriptionPool(
+                    self.model_path, num_workers, TRANSCRIBE_OPTIONS, self.use_vad
+                )
+                self._pools[num_workers] = pool
+            return pool
+
+    def warmup(self) -> None:
+        """
+        Load whisper where transcriptions run: in the workers of the pools
+        in use, or in this process if no pool is running.
+        """
+        with self._pools_lock:
+            pools = [pool for pool in self._pools.values() if pool.is_running]
+        if not pools:
+            self.model.warmup()
+        for pool in pools:
+            pool.warmup()
+
+    def close_pools(self) -> None:
+        with self._pools_lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            pool.close()
+
+    def iter_transcribe_batch(
+        self, audio_paths: list[str], num_workers: int = 1
+    ) -> Iterator[dict]:
+        """
+        Transcribe files, yielding each result as it is ready. With more than
+        one worker the files are spread over a process pool and results come
+        back in completion order.
+        """
+        if num_workers > 1 and len(audio_paths) > 1:
+            results = self._iter_transcribe_parallel(audio_paths, num_workers)
+        else:
+            results = (
+                file_result(str(p), self.transcribe_segments(p)) for p in audio_paths
+            )
+        for i, res in enumerate(results):
+            yield res
+            report_progress(
+                (i + 1) / len(audio_paths), f"Transcribed {res['file_path']}"
+            )
+
+    def _iter_transcribe_parallel(
+        self, audio_paths: list[str], num_workers: int
+    ) -> Iterator[dict]:
+        """Serve cached transcripts directly and send the rest to the pool."""
+        keys = {}
+        for audio_path in audio_paths:
+            key = self._cache_key(audio_path)
+            cached = self.cache.get(key)
+            if cached is None:
+                keys[str(audio_path)] = key
+            else:
+                yield file_result(str(audio_path), json.loads(cached))
+        if not keys:
+            return
+        pool = self._get_pool(num_workers)
+        checkpoints = {p: self.cache.checkpoint(key) for p, key in keys.items()}
+        for res in pool.iter_transcribe(checkpoints):
+            file_path = res["file_path"]
+            self.cache.put(keys[file_path], json.dumps(res["segments"]))
+            checkpoints[file_path].remove()
+            yield file_result(file_path, res["segments"])
+
+    def transcribe_batch(
+        self, audio_paths: list[str], num_workers: int = 1
+    ) -> list[dict]:
+        """Transcribe files, returning the results in input order."""
+        order = {str(p): i for i, p in enumerate(audio_paths)}
+        return sorted(
+            self.iter_transcribe_batch(audio_paths, num_workers),
+            key=lambda r: order[r["file_path"]],
+        )
 
     def _write_res_to_dir(self, res: list[str], out_dir: str) -> None:
         out_dir = Path(out_dir)
@@ -49,10 +192,15 @@ class AudioTranscriptionModel:
             ) as f:
                 f.write(r["result"])
 
+    def iter_transcribe_files_in_directory(
+        self, input_dir: str, num_workers: int = 1
+    ) -> Iterator[dict]:
+        return self.iter_transcribe_batch(self.get_audio_files(input_dir), num_workers)
+
     def transcribe_files_in_directory(
-        self, input_dir: str, out_dir: str = None
+        self, input_dir: str, out_dir: str = None, num_workers: int = 1
     ) -> list[str]:
-        res = self.transcribe_batch(self.get_audio_files(input_dir))
+        res = self.transcribe_batch(self.get_audio_files(input_dir), num_workers)
         if out_dir:
             self._write_res_to_dir(res, out_dir)
         return res
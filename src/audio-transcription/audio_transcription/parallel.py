@@ -0,0 +1,200 @@
+"""Process pool that transcribes audio files with one whisper model per worker."""
+
+import logging
+import multiprocessing
+import os
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterator, Optional
+
+from audio_transcription.checkpoint import (
+    TranscriptCheckpoint,
+    iter_transcribe_resumable,
+)
+
+logger = logging.getLogger(__name__)
+
+# workers, and the models they hold, are shut down after this long unused
+POOL_IDLE_SECONDS = 300
+
+# whisper model and transcribe settings owned by the current worker process
+_worker_model = None
+_worker_options: dict = {}
+_worker_use_vad = True
+
+
+def _init_worker(
+    model_path: str, options: dict, use_vad: bool, torch_threads: int
+) -> None:
+    import torch
+    import whisper
+
+    global _worker_model, _worker_options, _worker_use_vad
+    # keep workers from oversubscribing the cores between them
+    torch.set_num_threads(torch_threads)
+    _worker_model = whisper.load_model(model_path)
+    _worker_options = options
+    _worker_use_vad = use_vad
+
+
+def _worker_ready() -> bool:
+    return _worker_model is not None
+
+
+def _transcribe_in_worker(audio_path: str, checkpoint: TranscriptCheckpoint) -> dict:
+    import whisper
+
+    audio = whisper.load_audio(audio_path)
+    segments = iter_transcribe_resumable(
+        _worker_model, audio, _worker_options, _worker_use_vad, checkpoint
+    )
+    return {"file_path": audio_path, "segments": list(segments)}
+
+
+def probe_duration(audio_path: str) -> Optional[float]:
+    """Return the duration of an audio file in seconds, or None if unknown."""
+    try:
+        out = subprocess.run(
+            [
+                "ffprobe",
+                "-v",
+                "error",
+                "-show_entries",
+                "format=duration",
+                "-of",
+                "default=noprint_wrappers=1:nokey=1",
+                audio_path,
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        return float(out.strip())
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+
+
+def order_by_duration(audio_paths: list[str]) -> list[str]:
+    """
+    Sort files longest first. Handing the longest files out first keeps
+    workers from idling at the end of a batch while one finishes a long file.
+    Falls back to file size when ffprobe cannot read a duration.
+    """
+    durations = [probe_duration(p) for p in audio_paths]
+    if any(d is None for d in durations):
+        durations = [Path(p).stat().st_size for p in audio_paths]
+    return [p for _, p in sorted(zip(durations, audio_paths), reverse=True)]
+
+
+class TranscriptionPool:
+    """
+    A pool of worker processes, each holding its own whisper model. The
+    workers are started on first use and kept alive between batches so the
+    model is only loaded once per worker, and shut down once no batch has
+    used them for idle_seconds. Batches from several threads can run on the
+    pool at the same time.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        num_workers: int,
+        options: dict,
+        use_vad: bool,
+        idle_seconds: float = POOL_IDLE_SECONDS,
+    ):
+        self.model_path = model_path
+        self.num_workers = num_workers
+        self.options = options
+        self.use_vad = use_vad
+        self.idle_seconds = idle_seconds
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._active = 0
+        self._idle_timer: Optional[threading.Timer] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._executor is not None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            torch_threads = max(1, (os.cpu_count() or 1) // self.num_workers)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                # fork is unsafe once torch has started its own threads
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_path, self.options, self.use_vad, torch_threads),
+            )
+        return self._executor
+
+    def warmup(self) -> None:
+        """Start the workers now, each loads its whisper model as it starts."""
+        executor = self._checkout()
+        try:
+            futures = [executor.submit(_worker_ready) for _ in range(self.num_workers)]
+            for future in futures:
+                future.result()
+        finally:
+            self._checkin()
+
+    def iter_transcribe(
+        self, checkpoints: dict[str, TranscriptCheckpoint]
+    ) -> Iterator[dict]:
+        """
+        Transcribe each audio file, resuming from its checkpoint. Yields
+        results in the order the files finish.
+        """
+        executor = self._checkout()
+        futures = []
+        try:
+            futures = [
+                executor.submit(_transcribe_in_worker, p, checkpoints[p])
+                for p in order_by_duration(list(checkpoints))
+            ]
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # only this batch's futures, other batches may share the pool
+            for future in futures:
+                future.cancel()
+            self._checkin()
+
+    def _checkout(self) -> ProcessPoolExecutor:
+        with self._lock:
+            self._active += 1
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+                self._idle_timer = None
+            return self._get_executor()
+
+    def _checkin(self) -> None:
+        with self._lock:
+            self._active -= 1
+            if self._active == 0 and self.idle_seconds > 0:
+                self._idle_timer = threading.Timer(
+                    self.idle_seconds, self._close_if_idle
+                )
+                self._idle_timer.daemon = True
+                self._idle_timer.start()
+
+    def _close_if_idle(self) -> None:
+        with self._lock:
+            if self._active == 0:
+                self._shutdown()
+
+    def _shutdown(self) -> None:
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+        if self._executor is not None:
+            logger.info(f"Shutting down {self.num_workers} transcription workers")
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._shutdown()
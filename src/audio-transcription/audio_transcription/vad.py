@@ -0,0 +1,183 @@
+"""Energy based voice activity detection used to skip silence before whisper."""
+
+import bisect
+import itertools
+from typing import Iterator
+
+import numpy as np
+
+# whisper works on 16 kHz mono audio
+SAMPLE_RATE = 16000
+# whisper's encoder window, whisper.audio.N_SAMPLES
+WINDOW_SAMPLES = 30 * SAMPLE_RATE
+# whisper keeps at most 223 prompt tokens, this is comfortably more
+PROMPT_CHARS = 1000
+
+
+def frame_energy_db(audio: np.ndarray, frame_length: int) -> np.ndarray:
+    """RMS energy of consecutive non-overlapping frames, in dB full scale."""
+    num_frames = len(audio) // frame_length
+    frames = audio[: num_frames * frame_length].reshape(num_frames, frame_length)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+def detect_speech(
+    audio: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    frame_ms: int = 30,
+    dynamic_range_db: float = 35.0,
+    min_level_db: float = -50.0,
+    min_speech_ms: int = 250,
+    min_silence_ms: int = 500,
+    pad_ms: int = 200,
+) -> list[tuple[int, int]]:
+    """
+    Return (start, end) sample ranges that likely contain speech.
+
+    A frame counts as speech when it is within dynamic_range_db of the
+    loudest frame and louder than min_level_db. Gaps shorter than
+    min_silence_ms are bridged, regions shorter than min_speech_ms are
+    dropped and the rest are padded by pad_ms on both sides so word
+    onsets are not clipped.
+    """
+    frame_length = sample_rate * frame_ms // 1000
+    energy = frame_energy_db(audio, frame_length)
+    if len(energy) == 0:
+        return []
+    threshold = max(energy.max() - dynamic_range_db, min_level_db)
+    voiced = energy > threshold
+
+    # run boundaries: +1 where speech starts, -1 where it stops
+    edges = np.diff(np.concatenate(([0], voiced.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    min_silence = min_silence_ms // frame_ms
+    min_speech = min_speech_ms // frame_ms
+    regions: list[list[int]] = []
+    for start, end in zip(starts, ends):
+        if regions and start - regions[-1][1] < min_silence:
+            regions[-1][1] = end
+        else:
+            regions.append([start, end])
+
+    pad = pad_ms * sample_rate // 1000
+    return [
+        (
+            max(0, int(start) * frame_length - pad),
+            min(len(audio), int(end) * frame_length + pad),
+        )
+        for start, end in regions
+        if end - start >= min_speech
+    ]
+
+
+def speech_regions(
+    audio: np.ndarray, use_vad: bool = True, max_region_seconds: int = 600
+) -> list[tuple[int, int]]:
+    """
+    The sample ranges to send to whisper: the detected speech, or the whole
+    recording without VAD. Long regions are split so no single whisper call
+    (and so no unit of checkpointed work) covers more than max_region_seconds.
+    """
+    regions = detect_speech(audio) if use_vad else [(0, len(audio))]
+    max_length = max_region_seconds * SAMPLE_RATE
+    return [
+        (start, min(start + max_length, end))
+        for region_start, end in regions
+        for start in range(region_start, end, max_length)
+    ]
+
+
+def pack_regions(
+    regions: list[tuple[int, int]], window_samples: int = WINDOW_SAMPLES
+) -> list[list[tuple[int, int]]]:
+    """
+    Group consecutive regions whose audio together fits in one whisper
+    window. Whisper pads every call to a full window, so sending each short
+    region on its own would cost an encoder pass per region. Regions longer
+    than a window are left on their own, whisper windows those itself.
+    """
+    windows: list[list[tuple[int, int]]] = []
+    length = 0
+    for start, end in regions:
+        if windows and length + end - start <= window_samples:
+            windows[-1].append((start, end))
+            length += end - start
+        else:
+            windows.append([(start, end)])
+            length = end - start
+    return windows
+
+
+def speech_windows(
+    audio: np.ndarray, use_vad: bool = True
+) -> list[list[tuple[int, int]]]:
+    """The speech regions to send to whisper, packed into windows."""
+    return pack_regions(speech_regions(audio, use_vad))
+
+
+def _recording_time(
+    seconds: float, window: list[tuple[int, int]], offsets: list[int], end: bool
+) -> float:
+    """
+    Map a time in the packed window audio back to the whole recording. A time
+    on the boundary of two regions is the end of the first or the start of
+    the second.
+    """
+    sample = seconds * SAMPLE_RATE
+    find = bisect.bisect_left if end else bisect.bisect_right
+    i = max(0, find(offsets, sample) - 1)
+    start, end = window[i]
+    return (start + min(sample - offsets[i], end - start)) / SAMPLE_RATE
+
+
+def transcribe_window(
+    whisper_model,
+    audio: np.ndarray,
+    window: list[tuple[int, int]],
+    options: dict,
+    prompt: str = "",
+) -> list[dict]:
+    """
+    Transcribe the regions of a window as one clip, returning whisper's
+    segments with timestamps (in seconds) relative to the whole recording.
+    prompt is the text before the window, so whisper keeps the context it
+    would have had transcribing the recording in one call.
+    """
+    clip = np.concatenate([audio[start:end] for start, end in window])
+    # where each region starts in the clip
+    offsets = list(
+        itertools.accumulate((end - start for start, end in window[:-1]), initial=0)
+    )
+    if prompt and options.get("condition_on_previous_text", True):
+        options = {**options, "initial_prompt": prompt}
+    result = whisper_model.transcribe(clip, **options)
+    return [
+        {
+            "start": round(
+                _recording_time(segment["start"], window, offsets, end=False), 2
+            ),
+            "end": round(_recording_time(segment["end"], window, offsets, end=True), 2),
+            "text": segment["text"],
+        }
+        for segment in result["segments"]
+    ]
+
+
+def previous_text(segments: list[dict]) -> str:
+    """Prompt for the next window, whisper only uses the end of it."""
+    return "".join(segment["text"] for segment in segments)[-PROMPT_CHARS:]
+
+
+def iter_transcribe_segments(
+    whisper_model, audio: np.ndarray, options: dict, use_vad: bool = True
+) -> Iterator[dict]:
+    """Transcribe the speech one window at a time, yielding its segments."""
+    segments: list[dict] = []
+    for window in speech_windows(audio, use_vad):
+        segments = transcribe_window(
+            whisper_model, audio, window, options, previous_text(segments)
+        )
+        yield from segments
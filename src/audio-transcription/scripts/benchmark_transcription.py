@@ -0,0 +1,50 @@
+"""
+Compare serial and process pool transcription throughput.
+
+Usage: python scripts/benchmark_transcription.py <audio_dir> [worker counts...]
+e.g.   python scripts/benchmark_transcription.py tests 1 2 4 8
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from audio_transcription.cache import TranscriptionCache
+from audio_transcription.model import AudioTranscriptionModel
+
+CACHE_BYTES = 1024 * 1024 * 1024
+
+
+def main():
+    audio_dir = sys.argv[1]
+    worker_counts = [int(n) for n in sys.argv[2:]] or [1, 2, 4]
+
+    scratch = tempfile.TemporaryDirectory()
+    model = AudioTranscriptionModel(
+        cache=TranscriptionCache(Path(scratch.name) / "warmup", CACHE_BYTES)
+    )
+    files = model.get_audio_files(audio_dir)
+    print(f"{len(files)} audio files in {audio_dir}")
+
+    for num_workers in worker_counts:
+        if num_workers > 1:
+            # start the workers and load their models outside the timed run
+            model.transcribe_batch(files[:num_workers], num_workers=num_workers)
+        # an empty cache for every run, so each one transcribes all the files
+        model.cache = TranscriptionCache(
+            Path(scratch.name) / f"workers-{num_workers}", CACHE_BYTES
+        )
+        start = time.perf_counter()
+        model.transcribe_batch(files, num_workers=num_workers)
+        elapsed = time.perf_counter() - start
+        print(
+            f"workers={num_workers:<3} {elapsed:8.2f}s "
+            f"{len(files) / elapsed:6.2f} files/s"
+        )
+    model.close_pools()
+    scratch.cleanup()
+
+
+if __name__ == "__main__":
+    main()
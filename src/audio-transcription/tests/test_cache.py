@@ -0,0 +1,57 @@
+from typer.testing import CliRunner
+
+from audio_transcription.cache import TranscriptionCache, cache_key
+from audio_transcription.main import APP_NAME, app as cli_app
+
+
+def test_cache_key_depends_on_content_model_and_options(tmp_path):
+    a = tmp_path / "a.wav"
+    b = tmp_path / "b.wav"
+    a.write_bytes(b"same audio")
+    b.write_bytes(b"same audio")
+
+    key = cache_key(str(a), "base", {"fp16": False})
+    assert cache_key(str(b), "base", {"fp16": False}) == key
+    assert cache_key(str(a), "small", {"fp16": False}) != key
+    assert cache_key(str(a), "base", {"fp16": True}) != key
+
+    b.write_bytes(b"other audio")
+    assert cache_key(str(b), "base", {"fp16": False}) != key
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = TranscriptionCache(tmp_path, max_bytes=20)
+    cache.put("a", "x" * 8)
+    cache.put("b", "y" * 8)
+    assert cache.get("a") == "x" * 8  # a is now more recent than b
+
+    cache.put("c", "z" * 8)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "x" * 8
+    assert cache.get("c") == "z" * 8
+    assert cache.stats()["entries"] == 2
+
+
+def test_cache_survives_reopening(tmp_path):
+    TranscriptionCache(tmp_path, max_bytes=1024).put("a", "hello")
+    assert TranscriptionCache(tmp_path, max_bytes=1024).get("a") == "hello"
+
+
+def test_cache_command_prunes(tmp_path, monkeypatch):
+    monkeypatch.setenv("RESCUEBOX_TRANSCRIPTION_CACHE_DIR", str(tmp_path))
+    cache = TranscriptionCache.default()
+    cache.put("a", "hello")
+    cache.put("b", "world")
+
+    runner = CliRunner()
+    result = runner.invoke(cli_app, [f"/{APP_NAME}/cache"])
+    assert result.exit_code == 0
+    assert "2 cached transcripts" in result.stdout
+
+    result = runner.invoke(
+        cli_app, [f"/{APP_NAME}/cache", "--prune", "--max-size-mb", "0"]
+    )
+    assert result.exit_code == 0
+    assert "Pruned 2 transcripts" in result.stdout
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from audio_transcription.checkpoint import (
+    TranscriptCheckpoint,
+    iter_transcribe_resumable,
+)
+from audio_transcription.main import format_segments
+from audio_transcription.vad import SAMPLE_RATE
+
+
+class FakeWhisper:
+    """Returns one segment per call and fails on the call numbered fail_on."""
+
+    def __init__(self, fail_on=None):
+        self.calls = 0
+        self.fail_on = fail_on
+
+    def transcribe(self, audio, **options):
+        self.calls += 1
+        if self.calls == self.fail_on:
+            raise RuntimeError("crashed")
+        duration = len(audio) / SAMPLE_RATE
+        return {
+            "segments": [{"start": 0.0, "end": duration, "text": f" part {self.calls}"}]
+        }
+
+
+def speech_with_gaps(regions: int) -> np.ndarray:
+    # each region is too long to share a whisper window with the next
+    t = np.arange(20 * SAMPLE_RATE) / SAMPLE_RATE
+    speech = (0.5 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+    gap = np.zeros(3 * SAMPLE_RATE, dtype=np.float32)
+    return np.concatenate([gap, *[np.concatenate([speech, gap])] * regions])
+
+
+def test_resume_skips_completed_windows(tmp_path):
+    audio = speech_with_gaps(3)
+    checkpoint = TranscriptCheckpoint(tmp_path / "checkpoint.jsonl")
+
+    crashing = FakeWhisper(fail_on=3)
+    with pytest.raises(RuntimeError):
+        list(iter_transcribe_resumable(crashing, audio, {}, True, checkpoint))
+    done_until, segments = checkpoint.load()
+    assert [s["text"] for s in segments] == [" part 1", " part 2"]
+
+    resumed = FakeWhisper()
+    segments = list(iter_transcribe_resumable(resumed, audio, {}, True, checkpoint))
+
+    assert resumed.calls == 1
+    assert [s["text"] for s in segments] == [" part 1", " part 2", " part 1"]
+    assert [s["start"] for s in segments] == sorted(s["start"] for s in segments)
+
+
+def test_checkpoint_ignores_partially_written_line(tmp_path):
+    checkpoint = TranscriptCheckpoint(tmp_path / "checkpoint.jsonl")
+    checkpoint.append(100, [{"start": 0.0, "end": 1.0, "text": " hi"}])
+    with open(checkpoint.path, "a") as f:
+        f.write('{"end": 200, "segm')
+
+    assert checkpoint.load() == (100, [{"start": 0.0, "end": 1.0, "text": " hi"}])
+
+    # the torn line is gone, so progress recorded after it is not lost
+    checkpoint.append(300, [{"start": 2.0, "end": 3.0, "text": " there"}])
+    done_until, segments = checkpoint.load()
+    assert done_until == 300
+    assert [s["text"] for s in segments] == [" hi", " there"]
+
+
+def test_resume_after_torn_line_keeps_advancing(tmp_path):
+    audio = speech_with_gaps(3)
+    checkpoint = TranscriptCheckpoint(tmp_path / "checkpoint.jsonl")
+    with pytest.raises(RuntimeError):
+        list(iter_transcribe_resumable(FakeWhisper(3), audio, {}, True, checkpoint))
+    crashed_at, _ = checkpoint.load()
+    with open(checkpoint.path, "a") as f:
+        f.write('{"end": 1')
+
+    list(iter_transcribe_resumable(FakeWhisper(), audio, {}, True, checkpoint))
+    done_until, segments = checkpoint.load()
+
+    assert done_until > crashed_at
+    assert len(segments) == 3
+
+
+def test_format_segments():
+    segments = [
+        {"start": 0.0, "end": 2.5, "text": " Twinkle twinkle"},
+        {"start": 3725.25, "end": 3727.0, "text": " little star"},
+    ]
+    assert format_segments(segments) == (
+        "[00:00:00.00 - 00:00:02.50] Twinkle twinkle\n"
+        "[01:02:05.25 - 01:02:07.00] little star"
+    )
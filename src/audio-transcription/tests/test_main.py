@@ -1,9 +1,11 @@
 import json
 from pathlib import Path
 
+import pytest
 from rb.api.models import ResponseBody
-from audio_transcription.main import app as cli_app, APP_NAME, task_schema
+from audio_transcription.main import app as cli_app, APP_NAME, model, task_schema
 from rb.lib.common_tests import RBAppTest
+from rb.lib.whisper_models import whisper_models
 from rb.api.models import AppMetadata
 
 
@@ -11,6 +13,19 @@ class TestAudioTranscription(RBAppTest):
     def setup_method(self):
         self.set_app(cli_app, APP_NAME)
 
+    @pytest.fixture(autouse=True)
+    def empty_transcription_cache(self, tmp_path, monkeypatch):
+        # transcripts cached by earlier runs would skip whisper entirely, the
+        # model is loaded again with a cache in tmp_path
+        monkeypatch.setenv("RESCUEBOX_TRANSCRIPTION_CACHE_DIR", str(tmp_path))
+        model.unload()
+        yield
+        model.unload()
+
+    def test_model_uses_the_shared_whisper_registry(self):
+        assert model.get().model.registry is whisper_models
+        assert model.get().model.name == model.get().model_path
+
     def get_metadata(self):
         return AppMetadata(
             plugin_name=APP_NAME,
@@ -57,6 +72,26 @@ class TestAudioTranscription(RBAppTest):
         body = ResponseBody(**response.json())
         assert body.root.texts and "Twinkle" in body.root.texts[0].value
 
+    def test_api_transcribe_streaming(self):
+        transcribe_api = f"/{APP_NAME}/transcribe"
+        full_path = Path.cwd() / "src" / "audio-transcription" / "tests"
+        input_json = {
+            "inputs": {
+                "input_dir": {
+                    "path": str(full_path),
+                }
+            },
+            "parameters": {"num_workers": 1},
+        }
+        response = self.client.post(
+            transcribe_api, json=input_json, params={"streaming": True}
+        )
+        assert response.status_code == 200
+        # one TextResponse per file, streamed as each transcription finishes
+        texts = [json.loads(line) for line in response.text.splitlines() if line]
+        assert texts and all(t["output_type"] == "text" for t in texts)
+        assert any("Twinkle" in t["value"] for t in texts)
+
     def test_negative_api_transcribe_command(self):
         """pass in valid directory but no audio files , expect 422 validation error"""
         transcribe_api = f"/{APP_NAME}/transcribe"
@@ -0,0 +1,109 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from audio_transcription import parallel
+from audio_transcription.model import AudioTranscriptionModel
+from audio_transcription.parallel import TranscriptionPool, order_by_duration
+
+
+def test_order_by_duration_longest_first(tmp_path):
+    # the files are not real audio, so ordering falls back to file size
+    sizes = {"short.wav": 10, "long.wav": 1000, "medium.wav": 100}
+    for name, size in sizes.items():
+        (tmp_path / name).write_bytes(b"\0" * size)
+
+    ordered = order_by_duration([str(tmp_path / name) for name in sizes])
+
+    assert [p.split("/")[-1] for p in ordered] == [
+        "long.wav",
+        "medium.wav",
+        "short.wav",
+    ]
+
+
+class ThreadPool(ThreadPoolExecutor):
+    """Stands in for the process pool so no whisper models are loaded."""
+
+    def __init__(self, max_workers, mp_context, initializer, initargs):
+        super().__init__(max_workers)
+
+
+def fake_transcribe(audio_path, checkpoint):
+    time.sleep(0.05)
+    return {"file_path": audio_path, "segments": []}
+
+
+@pytest.fixture
+def thread_pool(monkeypatch):
+    monkeypatch.setattr(parallel, "ProcessPoolExecutor", ThreadPool)
+    monkeypatch.setattr(parallel, "_transcribe_in_worker", fake_transcribe)
+
+
+def audio_files(tmp_path, n):
+    paths = []
+    for i in range(n):
+        path = tmp_path / f"{i}.wav"
+        path.write_bytes(b"\0" * (i + 1))
+        paths.append(str(path))
+    return {p: None for p in paths}
+
+
+def test_pool_shuts_down_when_idle_but_not_while_in_use(thread_pool, tmp_path):
+    pool = TranscriptionPool("base", 2, {}, True, idle_seconds=0.02)
+    files = audio_files(tmp_path, 4)
+
+    results = pool.iter_transcribe(files)
+    next(results)
+    # a batch is still running, so waiting past the idle time keeps the pool
+    time.sleep(0.1)
+    assert pool.is_running
+    assert len(list(results)) == 3
+
+    time.sleep(0.1)
+    assert not pool.is_running
+    # and it starts again for the next batch
+    assert len(list(pool.iter_transcribe(files))) == 4
+    pool.close()
+
+
+def test_concurrent_batches_share_the_pool(thread_pool, tmp_path):
+    pool = TranscriptionPool("base", 2, {}, True, idle_seconds=0)
+    files = audio_files(tmp_path, 4)
+    results = []
+
+    def run():
+        results.append(len(list(pool.iter_transcribe(files))))
+
+    threads = [threading.Thread(target=run) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [4, 4, 4]
+    pool.close()
+
+
+class FakeSharedModel:
+    def __init__(self):
+        self.warmups = 0
+
+    def warmup(self):
+        self.warmups += 1
+
+
+def test_warmup_loads_whisper_in_the_pool_workers_when_in_use(thread_pool, tmp_path):
+    audio_model = AudioTranscriptionModel()
+    audio_model.model = FakeSharedModel()
+
+    # no pool yet, transcriptions run in this process
+    audio_model.warmup()
+    assert audio_model.model.warmups == 1
+
+    pool = audio_model._get_pool(2)
+    list(pool.iter_transcribe(audio_files(tmp_path, 2)))
+    audio_model.warmup()
+    assert audio_model.model.warmups == 1
+    assert pool.is_running
+    audio_model.close_pools()
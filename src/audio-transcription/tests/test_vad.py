@@ -0,0 +1,99 @@
+import numpy as np
+
+from audio_transcription.vad import (
+    SAMPLE_RATE,
+    WINDOW_SAMPLES,
+    detect_speech,
+    iter_transcribe_segments,
+    pack_regions,
+)
+
+
+def tone(seconds: float, amplitude: float = 0.5) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def silence(seconds: float) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return rng.normal(0, 1e-4, int(seconds * SAMPLE_RATE)).astype(np.float32)
+
+
+def test_detect_speech_finds_regions_between_silence():
+    audio = np.concatenate([silence(3), tone(1), silence(4), tone(2), silence(3)])
+
+    regions = [(s / SAMPLE_RATE, e / SAMPLE_RATE) for s, e in detect_speech(audio)]
+
+    assert len(regions) == 2
+    (s1, e1), (s2, e2) = regions
+    assert 2.7 <= s1 <= 3.0 and 4.0 <= e1 <= 4.3
+    assert 7.7 <= s2 <= 8.0 and 10.0 <= e2 <= 10.3
+
+
+def test_detect_speech_bridges_short_pauses_and_drops_blips():
+    audio = np.concatenate(
+        [tone(1), silence(0.2), tone(1), silence(3), tone(0.05), silence(3)]
+    )
+    regions = detect_speech(audio)
+    assert len(regions) == 1
+    assert regions[0][1] / SAMPLE_RATE < 2.5
+
+
+def test_detect_speech_silent_audio():
+    assert detect_speech(np.zeros(SAMPLE_RATE * 5, dtype=np.float32)) == []
+
+
+class FakeWhisper:
+    """Returns one segment per half of the clip it is given."""
+
+    def __init__(self):
+        self.calls = []
+        self.prompts = []
+
+    def transcribe(self, audio, **options):
+        self.calls.append(len(audio) / SAMPLE_RATE)
+        self.prompts.append(options.get("initial_prompt"))
+        half = len(audio) / SAMPLE_RATE / 2
+        return {
+            "segments": [
+                {"start": 0.0, "end": half, "text": " hi"},
+                {"start": half, "end": 2 * half, "text": " there"},
+            ]
+        }
+
+
+def test_iter_transcribe_segments_packs_regions_and_offsets_timestamps():
+    audio = np.concatenate([silence(3), tone(1), silence(4), tone(1), silence(1)])
+    model = FakeWhisper()
+
+    segments = list(iter_transcribe_segments(model, audio, {}))
+
+    # both speech regions go to the model in one call, not the 10 s recording
+    assert len(model.calls) == 1 and model.calls[0] < 3
+    assert [s["text"] for s in segments] == [" hi", " there"]
+    # each half of the packed clip maps back to its own region
+    assert 2.7 <= segments[0]["start"] <= 3.0 and 4.0 <= segments[0]["end"] <= 4.3
+    assert 7.7 <= segments[1]["start"] <= 8.0 and 9.0 <= segments[1]["end"] <= 9.3
+
+
+def test_windows_stay_within_whisper_window_and_keep_context():
+    audio = np.concatenate([np.concatenate([tone(5), silence(2)])] * 10)
+    model = FakeWhisper()
+
+    segments = list(iter_transcribe_segments(model, audio, {}))
+
+    assert len(model.calls) == 2
+    assert all(seconds <= WINDOW_SAMPLES / SAMPLE_RATE for seconds in model.calls)
+    assert len(segments) == 4
+    # the second window is conditioned on the text of the first
+    assert model.prompts == [None, " hi there"]
+    assert segments == sorted(segments, key=lambda s: s["start"])
+
+
+def test_pack_regions_leaves_long_regions_alone():
+    regions = [(0, 10), (20, 30), (40, 100), (110, 115)]
+    assert pack_regions(regions, window_samples=25) == [
+        [(0, 10), (20, 30)],
+        [(40, 100)],
+        [(110, 115)],
+    ]
@@ -2,6 +2,7 @@ import os
 
 import ollama
 import yaml
+from rb.lib.ollama import ensure_model  # type: ignore
 from rich import print
 
 CHAT_CONFIG_PATH = os.path.join(os.path.dirname(__file__), "chat_config.yml")
@@ -13,7 +14,7 @@ def load_chat_config() -> dict:
 
 
 def download_model(chat_config: dict) -> None:
-    ollama.pull(chat_config["model"]["name"])
+    ensure_model(chat_config["model"]["name"])
 
 
 def stream_output(user_content: str, chat_config: dict) -> str:
@@ -0,0 +1,177 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from rb.lib.progress import TaskCancelled, progress_callback
+
+logger = logging.getLogger(__name__)
+
+# Number of plugin tasks that run at the same time, override with RESCUEBOX_JOB_WORKERS
+DEFAULT_MAX_WORKERS = 2
+# Finished jobs kept in memory before the oldest are dropped
+MAX_FINISHED_JOBS = 1000
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    # cancel was requested, the job stops at its next progress report
+    CANCELLING = "cancelling"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+FINISHED_STATUSES = {JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED}
+
+
+@dataclass
+class Job:
+    id: str
+    command: str
+    status: JobStatus = JobStatus.QUEUED
+    progress: Optional[float] = None
+    message: Optional[str] = None
+    result: Any = None
+    error: Any = None
+    cancel_requested: bool = False
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    future: Optional[Future] = field(default=None, repr=False)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "command": self.command,
+            "status": self.status.value,
+            "progress": self.progress,
+            "message": self.message,
+            "error": self.error,
+            "cancel_requested": self.cancel_requested,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue(object):
+    """
+    Runs plugin commands in a bounded thread pool and keeps their status and
+    results in memory, so long running tasks do not hold an HTTP request open.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or int(
+            os.environ.get("RESCUEBOX_JOB_WORKERS", DEFAULT_MAX_WORKERS)
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="rb-job"
+        )
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, command: str, func: Callable, *args, **kwargs) -> Job:
+        job = Job(id=uuid.uuid4().hex, command=command)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        job.future = self._executor.submit(self._run, job, func, *args, **kwargs)
+        logger.debug(f"Submitted job {job.id} for {command}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a job. Queued jobs never start. A running job is marked
+        cancelling and stops the next time it reports progress, which raises
+        TaskCancelled in it; if it finishes first its result is discarded.
+        """
+        job = self.get(job_id)
+        if job is None or job.status in FINISHED_STATUSES:
+            return job
+        with self._lock:
+            job.cancel_requested = True
+            if job.status is JobStatus.RUNNING:
+                job.status = JobStatus.CANCELLING
+        if job.future is not None and job.future.cancel():
+            self._finish(job, JobStatus.CANCELLED)
+        return job
+
+    def _run(self, job: Job, func: Callable, *args, **kwargs) -> None:
+        with self._lock:
+            if not job.cancel_requested:
+                job.status = JobStatus.RUNNING
+        if job.cancel_requested:
+            self._finish(job, JobStatus.CANCELLED)
+            return
+        job.started_at = time.time()
+        token = progress_callback.set(
+            lambda fraction, message: self._update_progress(job, fraction, message)
+        )
+        try:
+            result = func(*args, **kwargs)
+            if isinstance(result, Response):
+                # list results come back as a JSON response, keep the value
+                # itself so it matches what the synchronous route returns
+                result = json.loads(result.body)
+            job.result = jsonable_encoder(result)
+            status = JobStatus.COMPLETED
+        except TaskCancelled:
+            logger.info(f"Job {job.id} stopped after it was cancelled")
+            status = JobStatus.CANCELLED
+        except HTTPException as e:
+            job.error = e.detail
+            status = JobStatus.FAILED
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}")
+            job.error = {"error": f"{e}"}
+            status = JobStatus.FAILED
+        finally:
+            progress_callback.reset(token)
+        if job.cancel_requested:
+            job.result = None
+            status = JobStatus.CANCELLED
+        elif status is JobStatus.COMPLETED:
+            job.progress = 1.0
+        self._finish(job, status)
+
+    def _update_progress(self, job: Job, fraction, message) -> None:
+        if job.cancel_requested:
+            raise TaskCancelled(f"Job {job.id} was cancelled")
+        if fraction is not None:
+            job.progress = fraction
+        if message is not None:
+            job.message = message
+
+    def _finish(self, job: Job, status: JobStatus) -> None:
+        job.status = status
+        job.finished_at = time.time()
+        logger.debug(f"Job {job.id} {status.value}")
+
+    def _prune(self) -> None:
+        finished = [job for job in self._jobs.values() if job.finished_at]
+        if len(finished) <= MAX_FINISHED_JOBS:
+            return
+        finished.sort(key=lambda job: job.finished_at)
+        for job in finished[: len(finished) - MAX_FINISHED_JOBS]:
+            del self._jobs[job.id]
+
+
+job_queue = JobQueue()
@@ -37,6 +37,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 
 
 app.include_router(routes.probes_router, prefix="/probes")
+app.include_router(routes.jobs_router, prefix="/jobs", tags=["jobs"])
 app.include_router(routes.cli_to_api_router)
 app.include_router(routes.ui_router)
 
@@ -14,10 +14,12 @@ from pydantic import (
     DirectoryPath,
     Field,
     FilePath,
+    PrivateAttr,
     RootModel,
     field_validator,
     model_validator,
 )
+from rb.lib.files import FileManifest, is_empty_dir
 
 API_APPMETDATA = "app_metadata"
 API_ROUTES = "routes"
@@ -69,6 +71,9 @@ class FileFilterDirectory(DirectoryInput):
     )
     path: str
     file_extensions: List[str]
+    # how deep to look for matching files, 0 is the directory itself, None is unlimited
+    max_depth: Optional[int] = 0
+    _manifest: Optional[FileManifest] = PrivateAttr(default=None)
 
     @field_validator("path")
     @classmethod
@@ -84,17 +89,27 @@ class FileFilterDirectory(DirectoryInput):
     @model_validator(mode="after")
     def file_filter(self) -> "FileFilterDirectory":
         path_obj = Path(self.path)
-        files = list(path_obj.glob("*"))
-        if not files:
+        # stops scanning at the first matching file, matching_files picks up from there
+        manifest = FileManifest(path_obj, self.file_extensions, self.max_depth)
+        if manifest.first() is not None:
+            self._manifest = manifest
+            return self
+        if is_empty_dir(path_obj):
             raise ValueError(f"validate directory: Directory {path_obj} is empty.")
-        number_of_matched_files = [
-            f.name for f in files if f.suffix.lower() in self.file_extensions
-        ]
-        if len(number_of_matched_files) < 1:
-            raise ValueError(
-                f"validate directory: No file extensions matching {self.file_extensions} found in directory: {path_obj}"
+        raise ValueError(
+            f"validate directory: No file extensions matching {self.file_extensions} found in directory: {path_obj}"
+        )
+
+    def matching_files(self) -> List[Path]:
+        """
+        Files in path with one of file_extensions. Continues the scan started
+        during validation rather than walking the directory again.
+        """
+        if self._manifest is None:
+            self._manifest = FileManifest(
+                self.path, self.file_extensions, self.max_depth
             )
-        return self
+        return list(self._manifest)
 
 
 class TextInput(BaseModel):
@@ -1,5 +1,6 @@
 from .cli import cli_to_api_router
+from .jobs import jobs_router
 from .probes import probes_router
 from .ui import ui_router
 
-__all__ = ["cli_to_api_router", "probes_router", "ui_router"]
+__all__ = ["cli_to_api_router", "jobs_router", "probes_router", "ui_router"]
@@ -1,12 +1,11 @@
 import inspect
 import json
 import logging
-import time
 from typing import Callable, Generator, Optional
 
 import typer
 from fastapi import APIRouter, HTTPException, Response, status
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from makefun import with_signature
 from pydantic import BaseModel
 from rb.api.models import (
@@ -22,6 +21,7 @@ from rb.api.models import (
     ResponseBody,
     TextResponse,
 )
+from rb.api.jobs import job_queue
 from rb.lib.stdout import Capturing  # type: ignore
 from rb.lib.stdout import capture_stdout_as_generator
 
@@ -83,7 +83,19 @@ def streaming_endpoint(callback: Callable, *args, **kwargs) -> Generator:
         f"🚀Streaming started for command: {callback.__name__} with args={args}, kwargs={kwargs}"
     )
 
-    for line in capture_stdout_as_generator(callback, *args, **kwargs):
+    lines = capture_stdout_as_generator(callback, *args, **kwargs)
+    while True:
+        try:
+            line = next(lines)
+        except StopIteration:
+            break
+        except Exception as e:
+            # response handler for plugin runtime errors raised mid-stream
+            logger.error(f"Error running streaming command: {e}")
+            yield ResponseBody(root=TextResponse(value=f"Error: {e}")).model_dump_json()
+            yield "\n"  # one JSON document per line
+            break
+
         try:
             # Attempt to parse the output if it's JSON-like
             parsed_line = (
@@ -95,7 +107,11 @@ def streaming_endpoint(callback: Callable, *args, **kwargs) -> Generator:
             response_body = None
 
             # Dynamically determine the response type
-            if isinstance(parsed_line, dict):
+            if isinstance(parsed_line, ResponseBody):
+                response_body = parsed_line
+            elif isinstance(parsed_line, BaseModel):  # a partial result model
+                response_body = ResponseBody(root=parsed_line)
+            elif isinstance(parsed_line, dict):
                 if "texts" in parsed_line:  # Matches BatchTextResponse structure
                     response_body = ResponseBody(root=BatchTextResponse(**parsed_line))
                 elif "files" in parsed_line:  # Matches BatchFileResponse structure
@@ -140,7 +156,7 @@ def streaming_endpoint(callback: Callable, *args, **kwargs) -> Generator:
                 root=TextResponse(value=f"Error: {str(e)}")
             ).model_dump_json()
 
-        time.sleep(0.01)
+        yield "\n"  # one JSON document per line
 
 
 def command_callback(command: typer.models.CommandInfo):
@@ -157,6 +173,14 @@ def command_callback(command: typer.models.CommandInfo):
     )
     new_params.append(streaming_param)
 
+    background_param = inspect.Parameter(
+        "background",
+        inspect.Parameter.KEYWORD_ONLY,
+        default=False,
+        annotation=Optional[bool],
+    )
+    new_params.append(background_param)
+
     new_signature = original_signature.replace(parameters=new_params)
 
     @with_signature(new_signature)
@@ -166,9 +190,22 @@ def command_callback(command: typer.models.CommandInfo):
         )
 
         streaming = kwargs.pop("streaming", False)
+        background = kwargs.pop("background", False)
+        if background:
+            job = job_queue.submit(
+                command.name or command.callback.__name__,
+                static_endpoint,
+                command.callback,
+                *args,
+                **kwargs,
+            )
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED, content=job.to_dict()
+            )
         if streaming:
             return StreamingResponse(
-                streaming_endpoint(command.callback, *args, **kwargs)
+                streaming_endpoint(command.callback, *args, **kwargs),
+                media_type="application/x-ndjson",
             )
 
         return static_endpoint(command.callback, *args, **kwargs)
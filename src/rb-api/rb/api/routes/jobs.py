@@ -0,0 +1,45 @@
+from fastapi import APIRouter, HTTPException, status
+from rb.api.jobs import Job, JobStatus, job_queue
+
+jobs_router = APIRouter()
+
+
+def get_job_or_404(job_id: str) -> Job:
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error": f"Job {job_id} not found"},
+        )
+    return job
+
+
+@jobs_router.get("/")
+def list_jobs():
+    return [job.to_dict() for job in job_queue.list()]
+
+
+@jobs_router.get("/{job_id}")
+def job_status(job_id: str):
+    return get_job_or_404(job_id).to_dict()
+
+
+@jobs_router.get("/{job_id}/result")
+def job_result(job_id: str):
+    job = get_job_or_404(job_id)
+    if job.status is JobStatus.FAILED:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=job.error
+        )
+    if job.status is not JobStatus.COMPLETED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"error": f"Job {job_id} is {job.status.value}"},
+        )
+    return job.result
+
+
+@jobs_router.post("/{job_id}/cancel")
+def cancel_job(job_id: str):
+    get_job_or_404(job_id)
+    return job_queue.cancel(job_id).to_dict()
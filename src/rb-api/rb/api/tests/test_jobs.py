@@ -0,0 +1,118 @@
+import threading
+import time
+from importlib.metadata import version
+
+from fastapi.testclient import TestClient
+from rb.api.jobs import JobQueue, JobStatus
+from rb.api.main import app
+from rb.api.routes.cli import static_endpoint
+from rb.lib.progress import report_progress
+
+client = TestClient(app)
+
+
+def wait_for(job, timeout=10):
+    deadline = time.time() + timeout
+    while job.status not in (
+        JobStatus.COMPLETED,
+        JobStatus.FAILED,
+        JobStatus.CANCELLED,
+    ):
+        assert time.time() < deadline, f"Job {job.id} did not finish"
+        time.sleep(0.01)
+    return job
+
+
+def test_background_command():
+    response = client.post("/manage/info", params={"background": True})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    deadline = time.time() + 10
+    while client.get(f"/jobs/{job_id}").json()["status"] != "completed":
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+    response = client.get(f"/jobs/{job_id}/result")
+    assert response.status_code == 200
+    assert version("rescuebox") in response.json()["value"]
+    assert any(job["job_id"] == job_id for job in client.get("/jobs/").json())
+
+
+def test_background_list_result_is_not_a_string():
+    queue = JobQueue(max_workers=1)
+
+    def list_routes():
+        return [{"rule": "/a"}, {"rule": "/b"}]
+
+    job = wait_for(queue.submit("routes", static_endpoint, list_routes))
+    assert job.status is JobStatus.COMPLETED
+    assert job.result == [{"rule": "/a"}, {"rule": "/b"}]
+
+
+def test_unknown_job():
+    assert client.get("/jobs/missing").status_code == 404
+    assert client.post("/jobs/missing/cancel").status_code == 404
+
+
+def test_job_progress_and_failure():
+    queue = JobQueue(max_workers=1)
+
+    def task():
+        report_progress(0.5, "halfway")
+        return "done"
+
+    job = wait_for(queue.submit("task", task))
+    assert job.status is JobStatus.COMPLETED
+    assert job.result == "done"
+    assert job.progress == 1.0
+    assert job.message == "halfway"
+
+    def failing_task():
+        raise ValueError("boom")
+
+    job = wait_for(queue.submit("failing_task", failing_task))
+    assert job.status is JobStatus.FAILED
+    assert job.error == {"error": "boom"}
+
+
+def test_cancel_jobs():
+    queue = JobQueue(max_workers=1)
+    release = threading.Event()
+    running = queue.submit("blocking", release.wait)
+    queued = queue.submit("queued", lambda: "never")
+
+    assert queue.cancel(queued.id).status is JobStatus.CANCELLED
+    queue.cancel(running.id)
+    release.set()
+    assert wait_for(running).status is JobStatus.CANCELLED
+    assert running.result is None
+
+
+def test_cancel_stops_running_job_at_next_progress_report():
+    queue = JobQueue(max_workers=1)
+    started, cancelled = threading.Event(), threading.Event()
+    steps = []
+
+    def task():
+        for i in range(100):
+            if i == 1:
+                started.set()
+                cancelled.wait()
+            report_progress(i / 100)
+            steps.append(i)
+        return "finished"
+
+    job = queue.submit("task", task)
+    started.wait()
+    queue.cancel(job.id)
+    assert job.status is JobStatus.CANCELLING
+    assert job.to_dict()["status"] == "cancelling"
+    assert job.to_dict()["cancel_requested"] is True
+    cancelled.set()
+
+    assert wait_for(job).status is JobStatus.CANCELLED
+    assert job.result is None
+    assert steps == [0]
+    # the worker is free for the next job
+    assert wait_for(queue.submit("next", lambda: "done")).result == "done"
@@ -1,3 +1,5 @@
+import json
+
 from fastapi.testclient import TestClient
 from rb.api.main import app
 
@@ -8,3 +10,13 @@ def test_liveness():
     response = client.get("/probes/liveness/")
     assert response.status_code == 200
     assert response.json() == {"message": "RescueBox API"}
+
+
+def test_streaming_command():
+    response = client.post("/manage/list_plugins", params={"streaming": True})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    messages = [json.loads(line) for line in response.text.splitlines() if line]
+    assert messages[0]["value"] == "Plugins:"
+    # the command's return value is streamed last
+    assert messages[-1]["output_type"] == "batchtext"
@@ -1,6 +1,10 @@
 import requests
 
-response = requests.post("http://localhost:8000/manage/list_plugins?streaming=True")
+response = requests.post(
+    "http://localhost:8000/manage/list_plugins?streaming=True", stream=True
+)
 
-for chunk in response.iter_content(chunk_size=8192):
-    print(chunk)
+# one JSON ResponseBody per line, delivered as the command prints it
+for line in response.iter_lines():
+    if line:
+        print(line)
@@ -0,0 +1,95 @@
+import os
+from logging import getLogger
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Union
+
+logger = getLogger(__name__)
+
+
+def iter_files(
+    directory: Union[str, Path],
+    extensions: Optional[Iterable[str]] = None,
+    max_depth: Optional[int] = None,
+) -> Iterator[Path]:
+    """
+    Lazily yield the files under a directory, optionally only those whose
+    suffix (case insensitive) is in extensions.
+
+    max_depth limits how far down subdirectories are followed: 0 only looks
+    at the directory itself, None has no limit. Files are yielded as the
+    directory is scanned, so callers that only need the first few matches
+    never read the rest of a large tree. Subdirectories that cannot be read
+    are skipped with a warning and symlinked directories are not followed.
+    """
+    if extensions is not None:
+        extensions = {ext.lower() for ext in extensions}
+    stack = [(os.fspath(directory), 0)]
+    while stack:
+        current, depth = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if max_depth is None or depth < max_depth:
+                                stack.append((entry.path, depth + 1))
+                            continue
+                        if not entry.is_file():
+                            continue
+                    except OSError:
+                        continue
+                    if (
+                        extensions is None
+                        or os.path.splitext(entry.name)[1].lower() in extensions
+                    ):
+                        yield Path(entry.path)
+        except OSError as e:
+            if current == os.fspath(directory):
+                raise
+            logger.warning(f"Skipping unreadable directory {current}: {e}")
+
+
+class FileManifest:
+    """
+    The files iter_files finds under a directory, scanned on demand and
+    remembered. Asking for the first file only scans until one is found;
+    iterating again replays what was found and continues the same scan.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        extensions: Optional[Iterable[str]] = None,
+        max_depth: Optional[int] = None,
+    ):
+        self._found: List[Path] = []
+        self._scan: Optional[Iterator[Path]] = iter_files(
+            directory, extensions, max_depth
+        )
+
+    def __iter__(self) -> Iterator[Path]:
+        i = 0
+        while True:
+            if i < len(self._found):
+                yield self._found[i]
+                i += 1
+            elif self._scan is None:
+                return
+            else:
+                path = next(self._scan, None)
+                if path is None:
+                    self._scan = None
+                else:
+                    self._found.append(path)
+
+    def first(self) -> Optional[Path]:
+        return next(iter(self), None)
+
+    def __deepcopy__(self, memo) -> "FileManifest":
+        # copies of a validated input share the scan instead of copying a generator
+        return self
+
+
+def is_empty_dir(directory: Union[str, Path]) -> bool:
+    with os.scandir(directory) as entries:
+        return next(entries, None) is None
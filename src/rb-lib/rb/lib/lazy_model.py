@@ -0,0 +1,57 @@
+import threading
+from logging import getLogger
+from typing import Callable, Generic, Optional, TypeVar
+
+logger = getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LazyModel(Generic[T]):
+    """
+    Holds a model that is only constructed the first time it is used.
+    Plugins create their models through this wrapper so that importing a
+    plugin (e.g. to build the CLI or the API routes) does not load weights.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        loader: Callable[[], T],
+        warmup: Optional[Callable[[T], None]] = None,
+    ):
+        self.name = name
+        self._loader = loader
+        self._warmup = warmup
+        self._model: Optional[T] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    def get(self) -> T:
+        """
+        Return the model, loading it on first use. Concurrent callers wait
+        for a single load.
+        """
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    logger.info(f"Loading model: {self.name}")
+                    self._model = self._loader()
+        return self._model
+
+    def warmup(self) -> T:
+        """
+        Load the model, then run its warmup hook, for models whose weights
+        are not loaded by the loader itself.
+        """
+        model = self.get()
+        if self._warmup is not None:
+            self._warmup(model)
+        return model
+
+    def unload(self) -> None:
+        with self._lock:
+            self._model = None
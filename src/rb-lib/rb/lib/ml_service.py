@@ -1,6 +1,15 @@
+import copy
 from dataclasses import dataclass
 from logging import getLogger
-from typing import Any, Callable, List, Optional, get_type_hints, Annotated
+from typing import (
+    Annotated,
+    Any,
+    Callable,
+    Iterator,
+    List,
+    Optional,
+    get_type_hints,
+)
 
 from fastapi import Body
 import typer
@@ -12,6 +21,8 @@ from rb.api.models import (
     TaskSchema,
     AppMetadata,
 )
+from rb.lib.lazy_model import LazyModel
+from rb.lib.stdout import is_streaming
 from rb.lib.utils import (
     ensure_ml_func_hinting_and_task_schemas_are_valid,
     ensure_ml_func_parameters_are_typed_dict,
@@ -50,6 +61,7 @@ class MLService(object):
         self.endpoints: List[EndpointDetails] = []
         self._app_metadata: Optional[AppMetadata] = None
         self.plugin_name = name
+        self.models: List[LazyModel] = []
 
         @self.app.command(f"/{self.name}/api/routes")
         def list_routes():
@@ -79,6 +91,32 @@ class MLService(object):
             logger.info(res)
             return res
 
+        @self.app.command(f"/{self.name}/api/warmup")
+        def warmup() -> str:
+            """
+            Loads all the models used by the app ahead of the first request.
+            """
+            for model in self.models:
+                model.warmup()
+            res = f"Loaded models: {[model.name for model in self.models]}"
+            logger.info(res)
+            return res
+
+    def add_model(
+        self,
+        name: str,
+        loader: Callable[[], Any],
+        warmup: Optional[Callable[[Any], None]] = None,
+    ) -> LazyModel:
+        """
+        Registers a model that is loaded on first use (or by the warmup
+        command) instead of when the plugin is imported. warmup, if given,
+        is also run on the model by the warmup command.
+        """
+        model = LazyModel(name, loader, warmup)
+        self.models.append(model)
+        return model
+
     def add_app_metadata(
         self, name: str, author: str, version: str, info: str, plugin_name: str
     ):
@@ -99,7 +137,18 @@ class MLService(object):
         task_schema_func: Optional[Callable[[], TaskSchema]] = None,
         short_title: Optional[str] = None,
         order: int = 0,
+        streaming_ml_function: Optional[Callable[..., Iterator[Any]]] = None,
     ):
+        """
+        `streaming_ml_function`, if given, takes the same arguments as
+        `ml_function` but yields partial results (e.g. one response per file).
+        It is used instead of `ml_function` when the API streams the output.
+
+        `parameters_cli_parser` may have a default string (e.g.
+        `typer.Argument("8,4", parser=...)`); the CLI argument is then
+        optional and the parsed default is also used when an API request
+        leaves out the parameters.
+        """
         ensure_ml_func_parameters_are_typed_dict(ml_function)
         ensure_ml_func_hinting_and_task_schemas_are_valid(
             ml_function, task_schema_func()
@@ -129,7 +178,38 @@ class MLService(object):
 
         logger.debug(f"Registered task schema command: {endpoint.task_schema_rule}")
 
-        if parameter_type:
+        def call_ml_function(*args):
+            if streaming_ml_function is not None and is_streaming():
+                return streaming_ml_function(*args)
+            return ml_function(*args)
+
+        if parameter_type and parameters_cli_parser.default is not ...:
+            # typer does not allow a default inside Annotated, so it is
+            # moved to the signature as None and parsed here instead
+            default_parameters = parameters_cli_parser.default
+            parameters_cli_parser = copy.copy(parameters_cli_parser)
+            parameters_cli_parser.default = ...
+
+            @self.app.command(f"/{self.name}" + rule)
+            def run(
+                inputs: Annotated[
+                    input_type,
+                    inputs_cli_parser,
+                    Body(embed=True),
+                ],
+                parameters: Annotated[
+                    Optional[parameter_type],
+                    parameters_cli_parser,
+                    Body(embed=True),
+                ] = None,
+            ):
+                if parameters is None:
+                    parameters = parameters_cli_parser.parser(default_parameters)
+                res = call_ml_function(inputs, parameters)
+                logger.info(res)
+                return res
+
+        elif parameter_type:
 
             @self.app.command(f"/{self.name}" + rule)
             def run(
@@ -144,7 +224,7 @@ class MLService(object):
                     Body(embed=True),
                 ],
             ):
-                res = ml_function(inputs, parameters)
+                res = call_ml_function(inputs, parameters)
                 logger.info(res)
                 return res
 
@@ -158,7 +238,7 @@ class MLService(object):
                     Body(embed=True),
                 ],
             ):
-                res = ml_function(inputs)
+                res = call_ml_function(inputs)
                 logger.info(res)
                 return res
 
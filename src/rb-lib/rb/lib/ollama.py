@@ -1,7 +1,19 @@
+import threading
+import time
+
+import ollama
 import requests
 import typer
 from rich import print
 
+# How long the list of locally available models is trusted before asking
+# ollama again
+MODEL_CACHE_TTL_SECONDS = 300
+
+_model_cache_lock = threading.Lock()
+_available_models: set[str] = set()
+_models_checked_at = float("-inf")
+
 
 def check_ollama() -> bool:
     response = requests.get("http://localhost:11434")
@@ -16,3 +28,45 @@ def use_ollama(func):
         if not check_ollama():
             print("[red] Ollama is not running. Please start it and try again.")
             raise typer.Abort()
+
+
+def _with_tag(model: str) -> str:
+    # ollama lists untagged models as <name>:latest
+    return model if ":" in model else f"{model}:latest"
+
+
+def available_models(refresh: bool = False) -> set[str]:
+    """
+    Names of the models ollama has locally, from `ollama.list()`. The answer
+    is reused for MODEL_CACHE_TTL_SECONDS.
+    """
+    global _available_models, _models_checked_at
+    with _model_cache_lock:
+        if refresh or time.monotonic() - _models_checked_at > MODEL_CACHE_TTL_SECONDS:
+            _available_models = {m.model for m in ollama.list().models}
+            _models_checked_at = time.monotonic()
+        return set(_available_models)
+
+
+def ensure_model(model: str) -> None:
+    """
+    Make sure ollama has the model, pulling it only if it is not available
+    locally. Raises ValueError if the pull fails.
+    """
+    if _with_tag(model) in available_models():
+        return
+    try:
+        response = ollama.pull(model)
+    except ollama.ResponseError as e:
+        raise ValueError(e.error)
+    if response.status != "success":
+        raise ValueError(f"Failed to pull model '{model}': {response}")
+    with _model_cache_lock:
+        _available_models.add(_with_tag(model))
+
+
+def clear_model_cache() -> None:
+    global _models_checked_at
+    with _model_cache_lock:
+        _available_models.clear()
+        _models_checked_at = float("-inf")
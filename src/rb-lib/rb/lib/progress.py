@@ -0,0 +1,28 @@
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+ProgressCallback = Callable[[Optional[float], Optional[str]], None]
+
+# Set by whoever runs a plugin function (e.g. the rb-api job queue) to receive
+# progress updates from inside it.
+progress_callback: ContextVar[Optional[ProgressCallback]] = ContextVar(
+    "progress_callback", default=None
+)
+
+
+class TaskCancelled(Exception):
+    """Raised by report_progress once the current task has been cancelled."""
+
+
+def report_progress(fraction: Optional[float] = None, message: Optional[str] = None):
+    """
+    Report progress of the current task. `fraction` is in [0, 1].
+    Does nothing when the task is not being tracked.
+
+    Raises TaskCancelled if the task was cancelled, so a long running task
+    stops at its next progress report. report_progress() with no arguments
+    only checks for cancellation.
+    """
+    callback = progress_callback.get()
+    if callback is not None:
+        callback(fraction, message)
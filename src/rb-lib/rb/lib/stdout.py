@@ -1,38 +1,170 @@
+import inspect
 import io
+import queue
 import sys
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
 from io import StringIO
+from typing import Optional, TextIO
+
+# Lines buffered between a running function and its consumer before the
+# function blocks on print()
+MAX_QUEUED_LINES = 100
+
+_DONE = object()
+
+# Where print() goes for the current thread / task, None meaning the real stdout
+_stdout_target: ContextVar[Optional[TextIO]] = ContextVar("stdout_target", default=None)
+_install_lock = threading.Lock()
+# True while running inside capture_stdout_as_generator
+_streaming: ContextVar[bool] = ContextVar("streaming", default=False)
+
+
+def is_streaming() -> bool:
+    """
+    Whether the current function's output is being streamed to a client, in
+    which case it may return a generator of partial results.
+    """
+    return _streaming.get()
+
+
+class _ContextStdout(object):
+    """
+    Stand-in for sys.stdout that writes to the stream set for the current
+    context, so concurrent requests each capture only their own output.
+    Threads started by a plugin do not inherit the context and print to the
+    real stdout.
+    """
+
+    def __init__(self, fallback: TextIO):
+        self._fallback = fallback
+
+    def _stream(self) -> TextIO:
+        return _stdout_target.get() or self._fallback
+
+    def write(self, s: str) -> int:
+        return self._stream().write(s)
+
+    def flush(self) -> None:
+        self._stream().flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream(), name)
+
+
+def _install_context_stdout() -> None:
+    with _install_lock:
+        if not isinstance(sys.stdout, _ContextStdout):
+            sys.stdout = _ContextStdout(sys.stdout)
+
+
+@contextmanager
+def redirect_stdout_to(stream: TextIO):
+    """
+    Like contextlib.redirect_stdout, but only for the current thread or
+    asyncio task instead of the whole process.
+    """
+    _install_context_stdout()
+    token = _stdout_target.set(stream)
+    try:
+        yield stream
+    finally:
+        _stdout_target.reset(token)
 
 
 class Capturing(list):
     def __enter__(self):
-        self._stdout = sys.stdout
-        sys.stdout = self._stringio = StringIO()
+        self._stringio = StringIO()
+        self._redirect = redirect_stdout_to(self._stringio)
+        self._redirect.__enter__()
         return self
 
     def __exit__(self, *args):
+        self._redirect.__exit__(*args)
         self.extend(self._stringio.getvalue().splitlines())
         del self._stringio  # free up some memory
-        sys.stdout = self._stdout
 
 
-def capture_stdout_as_generator(func, *args, **kwargs):
-    import sys
+class _QueueWriter(io.TextIOBase):
+    """
+    File-like object that sends every complete line written to it to a
+    queue. Writes block while the queue is full, until `closed_event` is set.
+    """
 
-    old_stdout = sys.stdout
-    sys.stdout = buffer = io.StringIO()
+    def __init__(self, output: queue.Queue, closed_event: threading.Event):
+        self._output = output
+        self._closed_event = closed_event
+        self._partial = ""
 
-    try:
-        func(*args, **kwargs)  # Run the function
-        sys.stdout.flush()
-        buffer.seek(0)
+    def writable(self) -> bool:
+        return True
 
-        while True:
-            line = buffer.readline()
-            if not line:
-                break  # Stop streaming when done
+    def write(self, s: str) -> int:
+        lines = (self._partial + s).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self.put(line)
+        return len(s)
 
-            print(f"Debug: Captured output -> {line.strip()}")  # Debugging print
-            yield line.strip()  # Ensure it's yielding non-empty lines
+    def flush(self) -> None:
+        if self._partial:
+            self.put(self._partial)
+            self._partial = ""
 
+    def put(self, item) -> None:
+        while not self._closed_event.is_set():
+            try:
+                self._output.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+
+def capture_stdout_as_generator(func, *args, **kwargs):
+    """
+    Run `func` in a background thread and yield its stdout line by line as it
+    is printed. If `func` returns a generator, each item it yields is passed
+    through as a partial result; any other non-None return value is yielded
+    last. Exceptions raised by `func` are re-raised in the consumer.
+    """
+    output = queue.Queue(maxsize=MAX_QUEUED_LINES)
+    closed_event = threading.Event()
+    writer = _QueueWriter(output, closed_event)
+    error = []
+
+    def run():
+        _streaming.set(True)
+        try:
+            with redirect_stdout_to(writer):
+                result = func(*args, **kwargs)
+                if inspect.isgenerator(result):
+                    for item in result:
+                        writer.flush()
+                        writer.put(item)
+                elif result is not None:
+                    writer.flush()
+                    writer.put(result)
+        except BaseException as e:  # re-raised in the consuming thread
+            error.append(e)
+        finally:
+            writer.flush()
+            writer.put(_DONE)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = output.get()
+            if item is _DONE:
+                break
+            if isinstance(item, str):
+                item = item.strip()
+                if not item:
+                    continue
+            yield item
     finally:
-        sys.stdout = old_stdout
+        # unblock the producer if the consumer stopped early
+        closed_event.set()
+    if error:
+        raise error[0]
@@ -0,0 +1,79 @@
+from pathlib import Path
+
+import pytest
+from rb.api.models import FileFilterDirectory
+from rb.lib.files import FileManifest, is_empty_dir, iter_files
+
+
+def make_tree(root: Path):
+    for name in ["a.mp3", "b.TXT", "sub/c.mp3", "sub/deeper/d.mp3", "sub/e.wav"]:
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x")
+
+
+def test_iter_files_filters_and_limits_depth(tmp_path):
+    make_tree(tmp_path)
+
+    def rel(paths):
+        return sorted(p.relative_to(tmp_path).as_posix() for p in paths)
+
+    assert rel(iter_files(tmp_path, [".mp3"])) == [
+        "a.mp3",
+        "sub/c.mp3",
+        "sub/deeper/d.mp3",
+    ]
+    assert rel(iter_files(tmp_path, [".mp3"], max_depth=0)) == ["a.mp3"]
+    assert rel(iter_files(tmp_path, [".mp3"], max_depth=1)) == ["a.mp3", "sub/c.mp3"]
+    assert rel(iter_files(tmp_path, [".txt"])) == ["b.TXT"]
+    assert len(list(iter_files(tmp_path))) == 5
+
+
+def test_is_empty_dir(tmp_path):
+    assert is_empty_dir(tmp_path)
+    (tmp_path / "sub").mkdir()
+    assert not is_empty_dir(tmp_path)
+
+
+def test_file_filter_directory_validation(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "a.mp3").write_text("x")
+
+    with pytest.raises(ValueError, match="No file extensions matching"):
+        FileFilterDirectory(path=str(tmp_path), file_extensions=[".mp3"])
+    FileFilterDirectory(path=str(tmp_path), file_extensions=[".mp3"], max_depth=1)
+
+    empty = tmp_path / "empty"
+    empty.mkdir()
+    with pytest.raises(ValueError, match="is empty"):
+        FileFilterDirectory(path=str(empty), file_extensions=[".mp3"])
+
+
+def test_file_manifest_continues_scan(tmp_path):
+    make_tree(tmp_path)
+    manifest = FileManifest(tmp_path, [".mp3"])
+
+    first = manifest.first()
+    assert first is not None
+    assert len(manifest._found) == 1  # validation only scanned to the first match
+
+    files = list(manifest)
+    assert files[0] == first
+    assert sorted(p.name for p in files) == ["a.mp3", "c.mp3", "d.mp3"]
+    (tmp_path / "new.mp3").write_text("x")
+    assert list(manifest) == files  # remembered, not rescanned
+
+
+def test_file_filter_directory_reuses_manifest(tmp_path):
+    make_tree(tmp_path)
+    directory = FileFilterDirectory(
+        path=str(tmp_path), file_extensions=[".mp3"], max_depth=None
+    )
+    assert sorted(p.name for p in directory.matching_files()) == [
+        "a.mp3",
+        "c.mp3",
+        "d.mp3",
+    ]
+    assert directory.model_copy(deep=True).matching_files() == (
+        directory.matching_files()
+    )
@@ -0,0 +1,62 @@
+import threading
+import time
+
+from rb.lib.lazy_model import LazyModel
+from rb.lib.ml_service import MLService
+from typer.testing import CliRunner
+
+
+def test_lazy_model_loads_on_first_use():
+    calls = []
+    model = LazyModel("test", lambda: calls.append(1) or "model")
+    assert not model.is_loaded
+    assert calls == []
+    assert model.get() == "model"
+    assert model.get() == "model"
+    assert model.is_loaded
+    assert calls == [1]
+
+    model.unload()
+    assert not model.is_loaded
+    assert model.get() == "model"
+    assert calls == [1, 1]
+
+
+def test_lazy_model_loads_once_across_threads():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    model = LazyModel("test", loader)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(model.get())) for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == [1]
+    assert all(result is results[0] for result in results)
+
+
+def test_warmup_command_loads_models():
+    service = MLService("lazy_test")
+    model = service.add_model("test", lambda: "model")
+    assert not model.is_loaded
+    result = CliRunner().invoke(service.app, ["/lazy_test/api/warmup"])
+    assert result.exit_code == 0
+    assert model.is_loaded
+
+
+def test_warmup_command_runs_warmup_hook():
+    service = MLService("lazy_hook_test")
+    warmed = []
+    service.add_model("test", lambda: "model", warmup=warmed.append)
+    for _ in range(2):
+        result = CliRunner().invoke(service.app, ["/lazy_hook_test/api/warmup"])
+        assert result.exit_code == 0
+    assert warmed == ["model", "model"]
@@ -0,0 +1,114 @@
+from typing import TypedDict
+
+import typer
+from rb.api.models import (
+    InputSchema,
+    InputType,
+    IntRangeDescriptor,
+    ParameterSchema,
+    RangedIntParameterDescriptor,
+    ResponseBody,
+    TaskSchema,
+    TextInput,
+    TextResponse,
+)
+from rb.lib.ml_service import MLService
+from rb.lib.stdout import capture_stdout_as_generator
+from typer.testing import CliRunner
+
+
+class Inputs(TypedDict):
+    text: TextInput
+
+
+def task_schema() -> TaskSchema:
+    return TaskSchema(
+        inputs=[InputSchema(key="text", label="Text", input_type=InputType.TEXT)],
+        parameters=[],
+    )
+
+
+def echo(inputs: Inputs) -> ResponseBody:
+    return ResponseBody(root=TextResponse(value=inputs["text"].text))
+
+
+def echo_words(inputs: Inputs):
+    for word in inputs["text"].text.split():
+        yield TextResponse(value=word)
+
+
+def get_run_command(service: MLService):
+    return next(
+        command.callback
+        for command in service.app.registered_commands
+        if command.name == f"/{service.name}/echo"
+    )
+
+
+def test_streaming_ml_function_is_used_when_streaming():
+    service = MLService("stream_test")
+    service.add_ml_service(
+        rule="/echo",
+        ml_function=echo,
+        inputs_cli_parser=typer.Argument(parser=lambda text: text),
+        task_schema_func=task_schema,
+        streaming_ml_function=echo_words,
+    )
+    run = get_run_command(service)
+    inputs = Inputs(text=TextInput(text="one two"))
+
+    assert run(inputs) == ResponseBody(root=TextResponse(value="one two"))
+    assert list(capture_stdout_as_generator(run, inputs)) == [
+        TextResponse(value="one"),
+        TextResponse(value="two"),
+    ]
+
+
+class RepeatParameters(TypedDict):
+    times: int
+
+
+def repeat_task_schema() -> TaskSchema:
+    return TaskSchema(
+        inputs=[InputSchema(key="text", label="Text", input_type=InputType.TEXT)],
+        parameters=[
+            ParameterSchema(
+                key="times",
+                label="Times",
+                value=RangedIntParameterDescriptor(
+                    range=IntRangeDescriptor(min=1, max=10), default=2
+                ),
+            )
+        ],
+    )
+
+
+def repeat(inputs: Inputs, parameters: RepeatParameters) -> ResponseBody:
+    return ResponseBody(
+        root=TextResponse(value=" ".join([inputs["text"].text] * parameters["times"]))
+    )
+
+
+def test_parameters_cli_parser_default_makes_parameters_optional():
+    service = MLService("default_test")
+    service.add_ml_service(
+        rule="/repeat",
+        ml_function=repeat,
+        inputs_cli_parser=typer.Argument(
+            parser=lambda text: Inputs(text=TextInput(text=text))
+        ),
+        parameters_cli_parser=typer.Argument(
+            "2", parser=lambda times: RepeatParameters(times=int(times))
+        ),
+        task_schema_func=repeat_task_schema,
+    )
+    runner = CliRunner()
+    command = f"/{service.name}/repeat"
+
+    def invoke(*args):
+        result = runner.invoke(service.app, [command, *args], standalone_mode=False)
+        assert result.exit_code == 0, result.output
+        return result.return_value.root.value
+
+    assert invoke("hi") == "hi hi"
+    assert invoke("hi", "3") == "hi hi hi"
@@ -0,0 +1,53 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from rb.lib import ollama as rb_ollama
+
+
+def list_response(*names):
+    return MagicMock(models=[MagicMock(model=name) for name in names])
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    rb_ollama.clear_model_cache()
+    yield
+    rb_ollama.clear_model_cache()
+
+
+@patch("rb.lib.ollama.ollama.pull")
+@patch(
+    "rb.lib.ollama.ollama.list", return_value=list_response("gemma3:1b", "llava:latest")
+)
+def test_ensure_model_skips_pull_for_local_models(mock_list, mock_pull):
+    rb_ollama.ensure_model("gemma3:1b")
+    rb_ollama.ensure_model("llava")
+    rb_ollama.ensure_model("gemma3:1b")
+
+    mock_pull.assert_not_called()
+    # the list is cached between calls
+    mock_list.assert_called_once()
+
+
+@patch("rb.lib.ollama.ollama.pull", return_value=MagicMock(status="success"))
+@patch("rb.lib.ollama.ollama.list", return_value=list_response())
+def test_ensure_model_pulls_missing_model_once(mock_list, mock_pull):
+    rb_ollama.ensure_model("gemma3:4b")
+    rb_ollama.ensure_model("gemma3:4b")
+
+    mock_pull.assert_called_once_with("gemma3:4b")
+
+
+@patch("rb.lib.ollama.ollama.pull", return_value=MagicMock(status="failure"))
+@patch("rb.lib.ollama.ollama.list", return_value=list_response())
+def test_ensure_model_failed_pull(mock_list, mock_pull):
+    with pytest.raises(ValueError, match="Failed to pull model 'gemma3:4b':"):
+        rb_ollama.ensure_model("gemma3:4b")
+
+
+@patch("rb.lib.ollama.ollama.list", return_value=list_response("gemma3:1b"))
+def test_available_models_expires(mock_list, monkeypatch):
+    rb_ollama.available_models()
+    monkeypatch.setattr(rb_ollama, "MODEL_CACHE_TTL_SECONDS", 0)
+    rb_ollama.available_models()
+    assert mock_list.call_count == 2
@@ -0,0 +1,104 @@
+import threading
+
+import pytest
+from rb.lib.stdout import Capturing, capture_stdout_as_generator
+
+
+def test_lines_are_yielded_while_function_runs():
+    release = threading.Event()
+
+    def task():
+        print("first")
+        # only returns once the consumer has seen the first line
+        assert release.wait(timeout=5)
+        print("second")
+        return "result"
+
+    output = capture_stdout_as_generator(task)
+    assert next(output) == "first"
+    release.set()
+    assert list(output) == ["second", "result"]
+
+
+def test_generator_results_are_streamed():
+    def task():
+        print("starting")
+        yield {"value": 1}
+        yield {"value": 2}
+
+    assert list(capture_stdout_as_generator(task)) == [
+        "starting",
+        {"value": 1},
+        {"value": 2},
+    ]
+
+
+def test_exceptions_are_raised_in_consumer():
+    def task():
+        print("before")
+        raise ValueError("boom")
+
+    output = capture_stdout_as_generator(task)
+    assert next(output) == "before"
+    with pytest.raises(ValueError, match="boom"):
+        next(output)
+
+
+def test_closing_consumer_unblocks_producer():
+    finished = threading.Event()
+
+    def task():
+        for i in range(1000):
+            print(i)
+        finished.set()
+
+    output = capture_stdout_as_generator(task)
+    assert next(output) == "0"
+    output.close()
+    assert finished.wait(timeout=5)
+
+
+def test_concurrent_captures_are_isolated():
+    num_threads = 8
+    barrier = threading.Barrier(num_threads)
+    captured = {}
+
+    def task(i):
+        with Capturing() as output:
+            barrier.wait()
+            for _ in range(200):
+                print(f"thread-{i}")
+        captured[i] = output
+
+    threads = [threading.Thread(target=task, args=(i,)) for i in range(num_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for i in range(num_threads):
+        assert captured[i] == [f"thread-{i}"] * 200
+
+
+def test_concurrent_streams_are_isolated():
+    num_streams = 4
+    barrier = threading.Barrier(num_streams)
+
+    def task(i):
+        barrier.wait()
+        for _ in range(100):
+            print(f"stream-{i}")
+
+    results = {}
+
+    def consume(i):
+        results[i] = list(capture_stdout_as_generator(task, i))
+
+    threads = [threading.Thread(target=consume, args=(i,)) for i in range(num_streams)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for i in range(num_streams):
+        assert results[i] == [f"stream-{i}"] * 100
@@ -0,0 +1,104 @@
+import threading
+import time
+
+from rb.lib.whisper_models import SharedWhisperModel, WhisperRegistry
+
+
+class FakeWhisper:
+    def __init__(self, name, device):
+        self.name = name
+        self.device = device
+
+    def transcribe(self, audio, **options):
+        return {"text": f"{self.name} heard {audio}", "options": options}
+
+
+def make_registry(loads, **kwargs):
+    def loader(name, device):
+        loads.append((name, device))
+        time.sleep(0.01)
+        return FakeWhisper(name, device)
+
+    sizes = {"base": 100, "small": 300}
+    return WhisperRegistry(
+        loader=loader, size_of=lambda model: sizes[model.name], **kwargs
+    )
+
+
+def test_registry_loads_each_model_once_across_threads():
+    loads = []
+    registry = make_registry(loads, idle_seconds=0)
+    models = []
+
+    def use():
+        with registry.use("base", "cpu") as model:
+            models.append(model)
+
+    threads = [threading.Thread(target=use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loads == [("base", "cpu")]
+    assert len({id(m) for m in models}) == 1
+    with registry.use("base", "cuda"):
+        pass
+    assert loads == [("base", "cpu"), ("base", "cuda")]
+    assert registry.total_bytes == 200
+
+
+def test_registry_evicts_idle_models_but_not_models_in_use():
+    loads = []
+    registry = make_registry(loads, idle_seconds=0.05)
+    with registry.use("small", "cpu"):
+        pass
+    with registry.use("base", "cpu"):
+        time.sleep(0.1)
+        assert registry.evict() == [("small", "cpu")]
+    assert registry.evict() == []
+    time.sleep(0.1)
+    assert registry.evict() == [("base", "cpu")]
+    assert registry.total_bytes == 0
+
+    # evicted models are loaded again on next use
+    with registry.use("small", "cpu"):
+        pass
+    assert loads.count(("small", "cpu")) == 2
+
+
+def test_registry_keeps_loaded_models_within_budget():
+    loads = []
+    registry = make_registry(loads, idle_seconds=0, max_bytes=350)
+    with registry.use("base", "cpu"):
+        pass
+    with registry.use("small", "cpu"):
+        pass
+    # base was unused and least recently used, so it made room for small
+    assert [s["model"] for s in registry.stats()] == ["small"]
+    assert registry.total_bytes == 300
+
+
+def test_shared_whisper_model_transcribes_with_registry_model():
+    loads = []
+    registry = make_registry(loads, idle_seconds=0)
+    first = SharedWhisperModel("base", "cpu", registry=registry)
+    second = SharedWhisperModel("base", "cpu", registry=registry)
+    assert first.transcribe("a", fp16=False) == {
+        "text": "base heard a",
+        "options": {"fp16": False},
+    }
+    assert second.transcribe("b")["text"] == "base heard b"
+    assert loads == [("base", "cpu")]
+    assert registry.stats()[0]["in_use"] is False
+
+
+def test_shared_whisper_model_warmup_loads_the_model():
+    loads = []
+    registry = make_registry(loads, idle_seconds=0)
+    model = SharedWhisperModel("small", "cpu", registry=registry)
+    assert loads == []
+    assert model.warmup() is model
+    assert loads == [("small", "cpu")]
+    model.transcribe("a")
+    assert loads == [("small", "cpu")]
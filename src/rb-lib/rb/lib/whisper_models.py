@@ -0,0 +1,212 @@
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from logging import getLogger
+from typing import Any, Callable, Iterator, Optional
+
+logger = getLogger(__name__)
+
+# Models nobody has used for this long are unloaded, 0 keeps them loaded
+IDLE_SECONDS_ENV = "RESCUEBOX_WHISPER_IDLE_SECONDS"
+DEFAULT_IDLE_SECONDS = 600
+# Unused models are unloaded, least recently used first, while the loaded
+# models take more memory than this, 0 for no limit
+MAX_MB_ENV = "RESCUEBOX_WHISPER_MAX_MB"
+DEFAULT_MAX_MB = 0
+
+
+def default_device() -> str:
+    import torch
+
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def load_whisper(name: str, device: str) -> Any:
+    import whisper  # imported on use, whisper pulls in torch
+
+    return whisper.load_model(name, device=device)
+
+
+def model_bytes(model: Any) -> int:
+    """Memory held by a torch model's parameters and buffers."""
+    tensors = itertools.chain(model.parameters(), model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+@dataclass
+class _Entry:
+    model: Any
+    size: int
+    # whisper installs hooks on the model while decoding, so one model runs
+    # one transcription at a time
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    users: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class WhisperRegistry:
+    """
+    Whisper models shared by every plugin in the process, keyed by model
+    size (or path) and device, so each is loaded once however many plugins
+    and requests use it. Tracks the memory the models take and unloads the
+    ones that have been idle for idle_seconds, or that are over the
+    max_bytes budget, least recently used first. Models in use are never
+    unloaded.
+    """
+
+    def __init__(
+        self,
+        idle_seconds: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        loader: Callable[[str, str], Any] = load_whisper,
+        size_of: Callable[[Any], int] = model_bytes,
+    ):
+        if idle_seconds is None:
+            idle_seconds = float(os.environ.get(IDLE_SECONDS_ENV, DEFAULT_IDLE_SECONDS))
+        if max_bytes is None:
+            max_bytes = int(os.environ.get(MAX_MB_ENV, DEFAULT_MAX_MB)) * 1024 * 1024
+        self.idle_seconds = idle_seconds
+        self.max_bytes = max_bytes
+        self._loader = loader
+        self._size_of = size_of
+        self._entries: dict[tuple[str, str], _Entry] = {}
+        self._load_locks: dict[tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._sweeper: Optional[threading.Thread] = None
+
+    @contextmanager
+    def use(self, name: str, device: Optional[str] = None) -> Iterator[Any]:
+        """
+        Borrow a model for exclusive use, loading it first if needed. Other
+        users of the same model wait until it is returned.
+        """
+        entry = self._checkout(name, device or default_device())
+        try:
+            with entry.lock:
+                yield entry.model
+        finally:
+            with self._lock:
+                entry.users -= 1
+                entry.last_used = time.monotonic()
+
+    def _checkout(self, name: str, device: str) -> _Entry:
+        key = (name, device)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.users += 1
+                return entry
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        # loading takes a while, only callers of the same model wait for it
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.users += 1
+                    return entry
+            logger.info(f"Loading whisper model {name} on {device}")
+            model = self._loader(name, device)
+            entry = _Entry(model, self._size_of(model), users=1)
+            with self._lock:
+                self._entries[key] = entry
+                self._evict()
+        self._start_sweeper()
+        return entry
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(entry.size for entry in self._entries.values())
+
+    def stats(self) -> list[dict]:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "model": name,
+                    "device": device,
+                    "bytes": entry.size,
+                    "in_use": entry.users > 0,
+                    "idle_seconds": 0 if entry.users else now - entry.last_used,
+                }
+                for (name, device), entry in self._entries.items()
+            ]
+
+    def evict(self) -> list[tuple[str, str]]:
+        """Unload the idle and over budget models now, returning their keys."""
+        with self._lock:
+            return self._evict()
+
+    def _evict(self) -> list[tuple[str, str]]:
+        now = time.monotonic()
+        unused = sorted(
+            (entry.last_used, key)
+            for key, entry in self._entries.items()
+            if entry.users == 0
+        )
+        evicted = []
+        total = sum(entry.size for entry in self._entries.values())
+        for last_used, key in unused:
+            idle = self.idle_seconds > 0 and now - last_used >= self.idle_seconds
+            over_budget = self.max_bytes > 0 and total > self.max_bytes
+            if idle or over_budget:
+                total -= self._entries.pop(key).size
+                evicted.append(key)
+                logger.info(f"Unloaded whisper model {key[0]} on {key[1]}")
+        return evicted
+
+    def clear(self) -> None:
+        """Unload every model that is not in use."""
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if e.users == 0]:
+                del self._entries[key]
+
+    def _start_sweeper(self) -> None:
+        if self.idle_seconds <= 0:
+            return
+        with self._lock:
+            if self._sweeper is not None:
+                return
+            self._sweeper = threading.Thread(
+                target=self._sweep, name="whisper-model-sweeper", daemon=True
+            )
+        self._sweeper.start()
+
+    def _sweep(self) -> None:
+        interval = min(60.0, max(1.0, self.idle_seconds / 2))
+        while True:
+            time.sleep(interval)
+            self.evict()
+
+
+whisper_models = WhisperRegistry()
+
+
+class SharedWhisperModel:
+    """
+    Stands in for a whisper model in code that calls transcribe, borrowing
+    the registry's model for each call instead of holding its own copy.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        device: Optional[str] = None,
+        registry: Optional[WhisperRegistry] = None,
+    ):
+        self.name = name
+        self.device = device
+        self.registry = registry if registry is not None else whisper_models
+
+    def warmup(self) -> "SharedWhisperModel":
+        """Load the model into the registry now instead of on first use."""
+        with self.registry.use(self.name, self.device):
+            pass
+        return self
+
+    def transcribe(self, audio, **options) -> dict:
+        with self.registry.use(self.name, self.device) as model:
+            return model.transcribe(audio, **options)
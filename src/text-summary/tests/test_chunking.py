@@ -0,0 +1,93 @@
+import asyncio
+from unittest.mock import patch
+
+from text_summary.chunking import (
+    CHARS_PER_TOKEN,
+    chunk_text,
+    summarize_chunked,
+    summarize_pages,
+)
+from text_summary.summary_prompt import CHUNK_PROMPT, PROMPT, REDUCE_PROMPT
+
+
+def numbered_words(n: int) -> str:
+    return " ".join(f"w{i:04d}" for i in range(n))
+
+
+def test_chunk_text_respects_size_and_overlap():
+    text = numbered_words(1000)  # 5 characters per word with the space
+    chunks = chunk_text(text, chunk_size=100, overlap=20)
+
+    assert all(len(chunk) <= 100 * CHARS_PER_TOKEN for chunk in chunks)
+    for previous, current in zip(chunks, chunks[1:]):
+        shared = set(previous.split()) & set(current.split())
+        assert 10 <= len(shared) <= 20
+    # nothing is dropped
+    words = {w for chunk in chunks for w in chunk.split()}
+    assert words == set(text.split())
+
+
+def test_chunk_text_short_and_empty():
+    assert chunk_text("a short text", chunk_size=100) == ["a short text"]
+    assert chunk_text("   ", chunk_size=100) == []
+
+
+def run_with_fake_model(text: str, chunk_size: int):
+    calls = []
+
+    async def fake_summarize(client, model, text, prompt, **fields):
+        calls.append(prompt)
+        await asyncio.sleep(0)
+        return f"summary{len(calls)}"
+
+    with patch("text_summary.chunking.summarize_async", side_effect=fake_summarize):
+        summary = asyncio.run(
+            summarize_chunked(None, "gemma3:1b", text, chunk_size, overlap=10)
+        )
+    return summary, calls
+
+
+def test_summarize_chunked_short_text_uses_single_prompt():
+    summary, calls = run_with_fake_model("short text", chunk_size=100)
+    assert calls == [PROMPT]
+
+
+def test_summarize_chunked_map_then_reduce():
+    summary, calls = run_with_fake_model(numbered_words(1000), chunk_size=100)
+    map_calls = [c for c in calls if c == CHUNK_PROMPT]
+    assert len(map_calls) > 1
+    assert calls[-1] == REDUCE_PROMPT
+    assert calls.count(REDUCE_PROMPT) == 1
+    assert summary == f"summary{len(calls)}"
+
+
+def test_chunk_text_same_across_page_boundaries():
+    words = numbered_words(1000).split()
+    pages = [" ".join(words[i : i + 37]) for i in range(0, len(words), 37)]
+    assert chunk_text("\n".join(pages), 100, 20) == chunk_text(" ".join(words), 100, 20)
+
+
+def test_summarize_pages_starts_before_last_page():
+    words = numbered_words(1000).split()
+    pages_read = []
+    pages_read_at_first_call = []
+
+    def pages():
+        for i in range(0, len(words), 100):
+            pages_read.append(i)
+            yield " ".join(words[i : i + 100])
+
+    async def fake_summarize(client, model, text, prompt, **fields):
+        if not pages_read_at_first_call:
+            pages_read_at_first_call.append(len(pages_read))
+        await asyncio.sleep(0)
+        return "summary"
+
+    with patch("text_summary.chunking.summarize_async", side_effect=fake_summarize):
+        summary = asyncio.run(
+            summarize_pages(None, "gemma3:1b", pages(), chunk_size=100, overlap=10)
+        )
+
+    assert summary == "summary"
+    assert len(pages_read) == 10
+    assert pages_read_at_first_call[0] < len(pages_read)
@@ -1,8 +1,15 @@
-from text_summary.main import app as cli_app, APP_NAME, task_schema
+from text_summary.main import (
+    app as cli_app,
+    APP_NAME,
+    parameters_cli_parse,
+    task_schema,
+)
+from text_summary.chunking import DEFAULT_CHUNK_OVERLAP, DEFAULT_CHUNK_SIZE
+from text_summary.summarize import DEFAULT_CONCURRENCY
 from rb.lib.common_tests import RBAppTest
 from rb.api.models import AppMetadata
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 import json
 
 
@@ -25,7 +32,11 @@ class TestTextSummary(RBAppTest):
         ]
 
     @patch("text_summary.summarize.ensure_model_exists")
-    @patch("text_summary.summarize.summarize", return_value="Mocked summary")
+    @patch(
+        "text_summary.chunking.summarize_async",
+        new_callable=AsyncMock,
+        return_value="Mocked summary",
+    )
     def test_summarize_command(self, summarize_mock, ensure_model_exists_mock):
         summarize_api = f"/{APP_NAME}/summarize"
         full_path = Path.cwd() / "src" / "text-summary" / "test_input"
@@ -43,8 +54,42 @@ class TestTextSummary(RBAppTest):
                 content = f.read()
                 assert "Mocked summary" == content
 
+    @patch(
+        "text_summary.main.process_files", return_value={"processed": [], "skipped": []}
+    )
+    def test_api_summarize_with_only_model_uses_defaults(self, process_files_mock):
+        summarize_api = f"/{APP_NAME}/summarize"
+        full_path = Path.cwd() / "src" / "text-summary" / "test_input"
+        input_json = {
+            "inputs": {
+                "input_dir": {"path": str(full_path)},
+                "output_dir": {"path": str(full_path)},
+            },
+            "parameters": {"model": "gemma3:1b"},
+        }
+        response = self.client.post(summarize_api, json=input_json)
+        assert response.status_code == 200, response.text
+        assert process_files_mock.call_args.kwargs == {
+            "concurrency": DEFAULT_CONCURRENCY,
+            "chunk_size": DEFAULT_CHUNK_SIZE,
+            "chunk_overlap": DEFAULT_CHUNK_OVERLAP,
+        }
+
+    def test_parameters_cli_parse_defaults_trailing_fields(self):
+        assert parameters_cli_parse("gemma3:1b,2") == {
+            "model": "gemma3:1b",
+            "concurrency": 2,
+            "chunk_size": DEFAULT_CHUNK_SIZE,
+            "chunk_overlap": DEFAULT_CHUNK_OVERLAP,
+        }
+        assert parameters_cli_parse("gemma3:1b")["concurrency"] == DEFAULT_CONCURRENCY
+
     @patch("text_summary.summarize.ensure_model_exists")
-    @patch("text_summary.summarize.summarize", return_value="Mocked summary")
+    @patch(
+        "text_summary.chunking.summarize_async",
+        new_callable=AsyncMock,
+        return_value="Mocked summary",
+    )
     def test_invalid_path(self, summarize_mock, ensure_model_exists_mock):
         summarize_api = f"/{APP_NAME}/summarize"
         bad_path = Path.cwd() / "src" / "text-summary" / "bad_tests"
@@ -56,7 +101,11 @@ class TestTextSummary(RBAppTest):
         assert result.exit_code != 0
 
     @patch("text_summary.summarize.ensure_model_exists")
-    @patch("text_summary.summarize.summarize", return_value="Mocked summary")
+    @patch(
+        "text_summary.chunking.summarize_async",
+        new_callable=AsyncMock,
+        return_value="Mocked summary",
+    )
     def test_api_summarize(self, summarize_mock, ensure_model_exists_mock):
         summarize_api = f"/{APP_NAME}/summarize"
         full_path = Path.cwd() / "src" / "text-summary" / "test_input"
@@ -1,9 +1,12 @@
+import asyncio
+
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import AsyncMock, patch, MagicMock
 from text_summary.model import (
     extract_response_after_think,
     ensure_model_exists,
     summarize,
+    summarize_async,
 )
 from text_summary.summary_prompt import PROMPT
 
@@ -18,21 +21,16 @@ def test_extract_response_after_think():
     assert extract_response_after_think(text_without_tag) == text_without_tag.strip()
 
 
-@patch("text_summary.model.ollama.pull")
-def test_ensure_model_exists(mock_pull):
-    # Test case where model is supported and pull is successful
-    mock_pull.return_value = MagicMock(status="success")
-    ensure_model_exists("gemma3:1b")  # Should not raise any exception
+@patch("text_summary.model.ensure_model")
+def test_ensure_model_exists(mock_ensure_model):
+    # Test case where model is supported
+    ensure_model_exists("gemma3:1b")
+    mock_ensure_model.assert_called_once_with("gemma3:1b")
 
     # Test case where model is not supported
     with pytest.raises(ValueError, match="Model 'unsupported_model' is not supported."):
         ensure_model_exists("unsupported_model")
 
-    # Test case where pull fails
-    mock_pull.return_value = MagicMock(status="failure")
-    with pytest.raises(ValueError, match="Failed to pull model 'gemma3:1b':"):
-        ensure_model_exists("gemma3:1b")
-
 
 @patch("text_summary.model.ollama.generate")
 def test_summarize(mock_generate):
@@ -49,3 +47,15 @@ def test_summarize(mock_generate):
     mock_generate.return_value = {"done": False}
     result = summarize("gemma3:1b", text="Some text")
     assert result == {"done": False}
+
+
+def test_summarize_async():
+    client = MagicMock()
+    client.generate = AsyncMock(
+        return_value={"done": True, "response": "Some response</think>Summary"}
+    )
+    result = asyncio.run(summarize_async(client, "gemma3:1b", "Some text"))
+    assert result == "Summary"
+    client.generate.assert_awaited_once_with(
+        "gemma3:1b", PROMPT.format(text="Some text")
+    )
@@ -1,6 +1,12 @@
+import asyncio
+import json
+import os
+import threading
+
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from pathlib import Path
+from text_summary.manifest import SummaryManifest, file_snapshot
 from text_summary.summarize import extract_text, process_files
 
 
@@ -14,46 +20,134 @@ def test_extract_text():
 
 
 @patch("text_summary.summarize.ensure_model_exists")
-@patch("text_summary.summarize.summarize", return_value="Mocked summary")
+@patch(
+    "text_summary.chunking.summarize_async",
+    new_callable=AsyncMock,
+    return_value="Mocked summary",
+)
 @patch(
     "text_summary.summarize.PARSERS", {".txt": MagicMock(return_value="Mocked text")}
 )
-@patch("text_summary.summarize.Path.mkdir")
-@patch("text_summary.summarize.Path.iterdir")
-@patch("text_summary.summarize.Path.write_text")
-@patch("text_summary.summarize.Path.exists", return_value=True)
-@patch("text_summary.summarize.Path.is_dir", return_value=True)
-def test_process_files(
-    mock_is_dir,
-    mock_exists,
-    mock_write_text,
-    mock_iterdir,
-    mock_mkdir,
-    mock_summarize,
-    mock_ensure_model_exists,
-):
-    mock_input_dir = Path("input_dir")
-    mock_output_dir = Path("output_dir")
+def test_process_files(mock_summarize, mock_ensure_model_exists, tmp_path):
+    input_dir = tmp_path / "input_dir"
+    input_dir.mkdir()
+    (input_dir / "mock_file.txt").write_text("text")
+    output_dir = tmp_path / "output_dir"
     mock_model = "gemma3:1b"
 
-    # Mock input directory contents
-    mock_file = MagicMock()
-    mock_file.suffix = ".txt"
-    mock_file.stem = "mock_file"
-    mock_file.name = "mock_file.txt"
-    mock_iterdir.return_value = [mock_file]
-
-    # Call the function
-    processed_files = process_files(
-        mock_model, str(mock_input_dir), str(mock_output_dir)
-    )
+    report = process_files(mock_model, str(input_dir), str(output_dir))
 
-    # Assertions
     mock_ensure_model_exists.assert_called_once_with(mock_model)
-    mock_mkdir.assert_called_once_with(parents=True, exist_ok=True)
-    mock_summarize.assert_called_once_with(mock_model, "Mocked text")
-    mock_write_text.assert_called_once_with("Mocked summary", encoding="utf-8")
-    assert processed_files == {str(Path(mock_output_dir) / "mock_file.txt")}
+    mock_summarize.assert_awaited_once()
+    assert mock_summarize.await_args.args[1:3] == (mock_model, "Mocked text")
+    assert (output_dir / "mock_file.txt").read_text() == "Mocked summary"
+    assert report == {"processed": [str(output_dir / "mock_file.txt")], "skipped": []}
+
+
+@patch("text_summary.summarize.ensure_model_exists")
+@patch(
+    "text_summary.chunking.summarize_async",
+    new_callable=AsyncMock,
+    return_value="Mocked summary",
+)
+def test_process_files_skips_unchanged_files(
+    mock_summarize, mock_ensure_model_exists, tmp_path
+):
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    for name in ["a.txt", "b.txt", "c.txt"]:
+        (input_dir / name).write_text(f"text of {name}")
+    output_dir = tmp_path / "output"
+
+    first = process_files("gemma3:1b", str(input_dir), str(output_dir))
+    assert len(first["processed"]) == 3 and first["skipped"] == []
+
+    (input_dir / "b.txt").write_text("b was edited")
+    (input_dir / "d.txt").write_text("a new file")
+    os.utime(input_dir / "c.txt")  # touched, content unchanged
+    second = process_files("gemma3:1b", str(input_dir), str(output_dir))
+    assert sorted(Path(p).name for p in second["processed"]) == ["b.txt", "d.txt"]
+    assert sorted(Path(p).name for p in second["skipped"]) == ["a.txt", "c.txt"]
+
+    # a different model makes every summary stale
+    third = process_files("gemma3:4b", str(input_dir), str(output_dir))
+    assert len(third["processed"]) == 4 and third["skipped"] == []
+
+    (output_dir / "a.txt").unlink()
+    fourth = process_files("gemma3:4b", str(input_dir), str(output_dir))
+    assert [Path(p).name for p in fourth["processed"]] == ["a.txt"]
+
+
+def test_manifest_record_while_saving(tmp_path):
+    sources = []
+    for i in range(2000):
+        source = tmp_path / f"{i}.txt"
+        source.write_text(str(i))
+        sources.append(source)
+    manifest = SummaryManifest(tmp_path)
+    done = threading.Event()
+    errors = []
+
+    def keep_saving():
+        try:
+            while not done.is_set():
+                manifest.save()
+        except Exception as e:
+            errors.append(e)
+
+    saver = threading.Thread(target=keep_saving)
+    saver.start()
+    try:
+        threads = [
+            threading.Thread(
+                target=lambda group=sources[i::4]: [
+                    manifest.record(source, source, {}, file_snapshot(source))
+                    for source in group
+                ]
+            )
+            for i in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        done.set()
+        saver.join()
+    manifest.save()
+
+    assert errors == []
+    saved = json.loads(manifest.path.read_text())
+    assert sorted(saved) == sorted(str(source) for source in sources)
+
+
+@patch("text_summary.summarize.ensure_model_exists")
+def test_file_edited_while_summarized_is_summarized_again(
+    mock_ensure_model_exists, tmp_path
+):
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    source = input_dir / "a.txt"
+    source.write_text("first draft")
+    output_dir = tmp_path / "output"
+
+    async def edit_while_summarizing(*args, **kwargs):
+        source.write_text("second draft, edited during the summary")
+        return "Summary of the first draft"
+
+    with patch(
+        "text_summary.chunking.summarize_async", side_effect=edit_while_summarizing
+    ):
+        process_files("gemma3:1b", str(input_dir), str(output_dir))
+
+    with patch(
+        "text_summary.chunking.summarize_async",
+        new_callable=AsyncMock,
+        return_value="Summary of the second draft",
+    ):
+        report = process_files("gemma3:1b", str(input_dir), str(output_dir))
+    assert [Path(p).name for p in report["processed"]] == ["a.txt"]
+    assert (output_dir / "a.txt").read_text() == "Summary of the second draft"
 
 
 @patch("text_summary.summarize.ensure_model_exists")
@@ -77,18 +171,45 @@ def test_process_files_input_dir_not_a_directory(
 
 @patch("text_summary.summarize.ensure_model_exists")
 @patch("text_summary.summarize.PARSERS", {})
-@patch(
-    "text_summary.summarize.Path.iterdir", return_value=[Path("unsupported_file.xyz")]
-)
+# iter_files only yields files with a supported extension
+@patch("text_summary.summarize.iter_files", return_value=[])
 @patch("text_summary.summarize.Path.mkdir")
 @patch("text_summary.summarize.Path.exists", return_value=True)
 @patch("text_summary.summarize.Path.is_dir", return_value=True)
 def test_process_files_no_supported_files(
-    mock_is_dir, mock_exists, mock_mkdir, mock_iterdir, mock_ensure_model_exists
+    mock_is_dir, mock_exists, mock_mkdir, mock_iter_files, mock_ensure_model_exists
 ):
     with patch("text_summary.summarize.logger.warning") as mock_warning:
-        processed_files = process_files("gemma3:1b", "input_dir", "output_dir")
-        assert not processed_files
+        report = process_files("gemma3:1b", "input_dir", "output_dir")
+        assert report == {"processed": [], "skipped": []}
         mock_warning.assert_called_once_with(
             "No files were processed. Check the input directory for supported file types."
         )
+
+
+@patch("text_summary.summarize.ensure_model_exists")
+def test_process_files_limits_concurrent_requests(mock_ensure_model_exists, tmp_path):
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    for i in range(6):
+        (input_dir / f"story_{i}.txt").write_text(f"story {i}")
+
+    in_flight = 0
+    max_in_flight = 0
+
+    async def fake_summarize(client, model, text, prompt, **fields):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return f"summary of {text}"
+
+    with patch("text_summary.chunking.summarize_async", side_effect=fake_summarize):
+        processed_files = process_files(
+            "gemma3:1b", str(input_dir), str(tmp_path / "output"), concurrency=2
+        )
+
+    assert max_in_flight == 2
+    assert len(processed_files["processed"]) == 6
+    assert (tmp_path / "output" / "story_3.txt").read_text() == "summary of story 3"
@@ -0,0 +1,65 @@
+import pytest
+from PyPDF2 import PdfWriter
+from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject
+from text_summary import text_parser
+from text_summary.text_parser import iter_pdf_pages, parse_pdf
+
+
+def write_pdf(path, num_pages):
+    writer = PdfWriter()
+    font = DictionaryObject(
+        {
+            NameObject("/Type"): NameObject("/Font"),
+            NameObject("/Subtype"): NameObject("/Type1"),
+            NameObject("/BaseFont"): NameObject("/Helvetica"),
+        }
+    )
+    for i in range(num_pages):
+        writer.add_blank_page(200, 200)
+        page = writer.pages[i]
+        content = DecodedStreamObject()
+        content.set_data(f"BT /F1 12 Tf 10 100 Td (page {i}) Tj ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(content)
+        page[NameObject("/Resources")] = DictionaryObject(
+            {NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})}
+        )
+    writer.write(path)
+
+
+def test_iter_pdf_pages_serial(tmp_path):
+    path = tmp_path / "doc.pdf"
+    write_pdf(path, 3)
+    assert list(iter_pdf_pages(path)) == ["page 0", "page 1", "page 2"]
+    assert parse_pdf(path) == "page 0page 1page 2"
+
+
+@pytest.fixture
+def small_pdf_pool(monkeypatch):
+    monkeypatch.setattr(text_parser, "PARALLEL_MIN_PAGES", 1)
+    monkeypatch.setattr(text_parser, "PAGES_PER_TASK", 3)
+    monkeypatch.setattr(text_parser, "PDF_WORKERS", 2)
+    text_parser.shutdown_pdf_pool()
+    yield
+    text_parser.shutdown_pdf_pool()
+
+
+def test_iter_pdf_pages_parallel_keeps_order(tmp_path, small_pdf_pool):
+    path = tmp_path / "doc.pdf"
+    write_pdf(path, 10)
+    pages = list(iter_pdf_pages(path))
+    assert pages == [f"page {i}" for i in range(10)]
+
+
+def test_pdfs_in_flight_share_one_pool(tmp_path, small_pdf_pool):
+    paths = [tmp_path / "a.pdf", tmp_path / "b.pdf"]
+    for path in paths:
+        write_pdf(path, 7)
+    a, b = (iter_pdf_pages(path) for path in paths)
+
+    first = [next(a), next(b)]
+    pool = text_parser.pdf_pool()
+    pages = first[:1] + list(a) + first[1:] + list(b)
+
+    assert pages == [f"page {i}" for i in range(7)] * 2
+    assert text_parser.pdf_pool() is pool
+    assert len(pool._processes) <= 2
@@ -0,0 +1,173 @@
+"""Map-reduce summarization of documents too long for one prompt."""
+
+import asyncio
+from typing import Iterator, Optional
+
+import ollama
+from text_summary.model import summarize_async
+from text_summary.summary_prompt import CHUNK_PROMPT, PROMPT, REDUCE_PROMPT
+
+# Rough size of a token in characters for English text. Good enough to keep
+# prompts inside the context window without depending on the model's tokenizer.
+CHARS_PER_TOKEN = 4
+
+# Defaults keep a chunk plus the prompt and the summary inside ollama's
+# default 2048 token context.
+DEFAULT_CHUNK_SIZE = 1500
+DEFAULT_CHUNK_OVERLAP = 100
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+class Chunker:
+    """
+    Splits text on whitespace into chunks of about chunk_size tokens, where
+    consecutive chunks share about overlap tokens of context. Text can be
+    added a piece (e.g. a page) at a time and chunks come out as soon as
+    they are full.
+    """
+
+    def __init__(self, chunk_size: int, overlap: int = 0):
+        self.max_chars = chunk_size * CHARS_PER_TOKEN
+        self.overlap_chars = min(overlap, chunk_size // 2) * CHARS_PER_TOKEN
+        self._words: list[str] = []
+        self._size = 0
+        # words added since the last chunk, the rest are overlap
+        self._new_words = 0
+
+    def _emit(self) -> str:
+        chunk = " ".join(self._words)
+        # keep up to overlap_chars of trailing words, but never the whole chunk
+        keep, shared = 0, 0
+        while keep + 1 < len(self._words) and shared + len(self._words[-keep - 1]) < (
+            self.overlap_chars
+        ):
+            shared += len(self._words[-keep - 1]) + 1
+            keep += 1
+        self._words = self._words[len(self._words) - keep :]
+        self._size = shared
+        self._new_words = 0
+        return chunk
+
+    def add(self, text: str) -> list[str]:
+        """Add text, returning the chunks it completed."""
+        chunks = []
+        for word in text.split():
+            if self._new_words and self._size + len(word) >= self.max_chars:
+                chunks.append(self._emit())
+            self._words.append(word)
+            self._size += len(word) + 1
+            self._new_words += 1
+        return chunks
+
+    def finish(self) -> Optional[str]:
+        """The last, partly filled chunk, if it has any new text."""
+        return self._emit() if self._new_words else None
+
+
+def chunk_text(text: str, chunk_size: int, overlap: int = 0) -> list[str]:
+    chunker = Chunker(chunk_size, overlap)
+    chunks = chunker.add(text)
+    last = chunker.finish()
+    return chunks + [last] if last else chunks
+
+
+async def _generate(
+    client: ollama.AsyncClient,
+    model: str,
+    text: str,
+    prompt: str,
+    generate_slots: Optional[asyncio.Semaphore],
+    **fields,
+) -> str:
+    if generate_slots is None:
+        return await summarize_async(client, model, text, prompt, **fields)
+    async with generate_slots:
+        return await summarize_async(client, model, text, prompt, **fields)
+
+
+async def summarize_pages(
+    client: ollama.AsyncClient,
+    model: str,
+    pages: Iterator[str],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    overlap: int = DEFAULT_CHUNK_OVERLAP,
+    generate_slots: Optional[asyncio.Semaphore] = None,
+) -> str:
+    """
+    Summarize a document given as an iterator of pages, which is read in a
+    worker thread. Text that fits in one chunk is summarized directly.
+    Longer text is split into chunks that are summarized concurrently (map),
+    each starting as soon as its pages are read, and the chunk summaries are
+    combined (reduce), in several rounds if they do not fit in one chunk
+    either. generate_slots limits the requests in flight.
+    """
+    chunker = Chunker(chunk_size, overlap)
+    # the raw text is kept only until it turns out to need more than one chunk
+    raw_pages: Optional[list[str]] = []
+    tasks: list[asyncio.Task] = []
+
+    def start_chunk(chunk: str) -> None:
+        tasks.append(
+            asyncio.create_task(
+                _generate(
+                    client,
+                    model,
+                    chunk,
+                    CHUNK_PROMPT,
+                    generate_slots,
+                    index=len(tasks) + 1,
+                )
+            )
+        )
+
+    try:
+        while (page := await asyncio.to_thread(next, pages, None)) is not None:
+            chunks = chunker.add(page)
+            if raw_pages is not None:
+                raw_pages.append(page)
+            for chunk in chunks:
+                start_chunk(chunk)
+                raw_pages = None
+        if not tasks:
+            return await _generate(
+                client, model, "".join(raw_pages), PROMPT, generate_slots
+            )
+        last = chunker.finish()
+        if last:
+            start_chunk(last)
+        summaries = await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    while True:
+        combined = "\n\n".join(summaries)
+        groups = chunk_text(combined, chunk_size)
+        if len(groups) <= 1 or len(groups) >= len(summaries):
+            # fits in one prompt, or another round would not make it shorter
+            return await _generate(
+                client, model, combined, REDUCE_PROMPT, generate_slots
+            )
+        summaries = await asyncio.gather(
+            *(
+                _generate(client, model, group, REDUCE_PROMPT, generate_slots)
+                for group in groups
+            )
+        )
+
+
+async def summarize_chunked(
+    client: ollama.AsyncClient,
+    model: str,
+    text: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    overlap: int = DEFAULT_CHUNK_OVERLAP,
+    generate_slots: Optional[asyncio.Semaphore] = None,
+) -> str:
+    """summarize_pages for text that is already extracted."""
+    return await summarize_pages(
+        client, model, iter([text]), chunk_size, overlap, generate_slots
+    )
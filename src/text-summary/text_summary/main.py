@@ -1,4 +1,4 @@
-from typing import TypedDict
+from typing_extensions import NotRequired, TypedDict
 
 from rb.lib.ml_service import MLService
 from rb.api.models import (
@@ -6,6 +6,8 @@ from rb.api.models import (
     InputType,
     ParameterSchema,
     EnumParameterDescriptor,
+    IntRangeDescriptor,
+    RangedIntParameterDescriptor,
     ResponseBody,
     TaskSchema,
     EnumVal,
@@ -13,7 +15,8 @@ from rb.api.models import (
     DirectoryInput,
 )
 from text_summary.model import SUPPORTED_MODELS
-from text_summary.summarize import process_files
+from text_summary.chunking import DEFAULT_CHUNK_OVERLAP, DEFAULT_CHUNK_SIZE
+from text_summary.summarize import DEFAULT_CONCURRENCY, process_files
 import json
 import typer
 from pathlib import Path
@@ -28,6 +31,9 @@ class Inputs(TypedDict):
 
 class Parameters(TypedDict):
     model: str
+    concurrency: NotRequired[int]
+    chunk_size: NotRequired[int]
+    chunk_overlap: NotRequired[int]
 
 
 def task_schema() -> TaskSchema:
@@ -50,8 +56,38 @@ def task_schema() -> TaskSchema:
             default=SUPPORTED_MODELS[0],
         ),
     )
+    concurrency_schema = ParameterSchema(
+        key="concurrency",
+        label="Concurrent requests",
+        subtitle="Number of files summarized by the model at the same time",
+        value=RangedIntParameterDescriptor(
+            range=IntRangeDescriptor(min=1, max=16), default=DEFAULT_CONCURRENCY
+        ),
+    )
+    chunk_size_schema = ParameterSchema(
+        key="chunk_size",
+        label="Chunk size",
+        subtitle="Longer documents are summarized in chunks of about this many tokens, then the chunk summaries are combined",
+        value=RangedIntParameterDescriptor(
+            range=IntRangeDescriptor(min=256, max=32768), default=DEFAULT_CHUNK_SIZE
+        ),
+    )
+    chunk_overlap_schema = ParameterSchema(
+        key="chunk_overlap",
+        label="Chunk overlap",
+        subtitle="Number of tokens consecutive chunks share",
+        value=RangedIntParameterDescriptor(
+            range=IntRangeDescriptor(min=0, max=1024), default=DEFAULT_CHUNK_OVERLAP
+        ),
+    )
     return TaskSchema(
-        inputs=[input_dir_schema, output_dir_schema], parameters=[parameter_schema]
+        inputs=[input_dir_schema, output_dir_schema],
+        parameters=[
+            parameter_schema,
+            concurrency_schema,
+            chunk_size_schema,
+            chunk_overlap_schema,
+        ],
     )
 
 
@@ -76,9 +112,20 @@ def summarize(
     output_dir = inputs["output_dir"].path
     model = parameters["model"]
 
-    processed_files = process_files(model, input_dir, output_dir)
+    report = process_files(
+        model,
+        input_dir,
+        output_dir,
+        concurrency=parameters.get("concurrency", DEFAULT_CONCURRENCY),
+        chunk_size=parameters.get("chunk_size", DEFAULT_CHUNK_SIZE),
+        chunk_overlap=parameters.get("chunk_overlap", DEFAULT_CHUNK_OVERLAP),
+    )
 
-    response = TextResponse(value=json.dumps(list(processed_files)))
+    processed, skipped = report["processed"], report["skipped"]
+    response = TextResponse(
+        value=json.dumps(processed + skipped),
+        subtitle=f"{len(processed)} processed, {len(skipped)} skipped (unchanged)",
+    )
     return ResponseBody(root=response)
 
 
@@ -96,8 +143,17 @@ def inputs_cli_parse(input: str) -> Inputs:
     )
 
 
-def parameters_cli_parse(model: str) -> Parameters:
-    return Parameters(model=model)
+def parameters_cli_parse(params: str) -> Parameters:
+    model, *rest = params.split(",")
+    # fields left off the end take their defaults
+    defaults = [DEFAULT_CONCURRENCY, DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_OVERLAP]
+    concurrency, chunk_size, chunk_overlap = map(int, rest + defaults[len(rest) :])
+    return Parameters(
+        model=model,
+        concurrency=concurrency,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+    )
 
 
 server.add_ml_service(
@@ -107,7 +163,8 @@ server.add_ml_service(
         parser=inputs_cli_parse, help="Input and output directory paths"
     ),
     parameters_cli_parser=typer.Argument(
-        parser=parameters_cli_parse, help="Model to use for summarization"
+        parser=parameters_cli_parse,
+        help="Model, then optionally the number of concurrent requests, chunk size and chunk overlap in tokens, comma separated (eg: gemma3:1b or gemma3:1b,4,1500,100)",
     ),
     short_title="Text Summarization",
     order=0,
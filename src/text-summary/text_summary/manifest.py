@@ -0,0 +1,115 @@
+"""Record of summarized files, used to skip unchanged inputs on re-runs."""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+from text_summary.summary_prompt import CHUNK_PROMPT, PROMPT, REDUCE_PROMPT
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = ".summary_manifest.json"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+PROMPT_HASH = hashlib.sha256(
+    "\0".join([PROMPT, CHUNK_PROMPT, REDUCE_PROMPT]).encode()
+).hexdigest()
+
+
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_snapshot(path: Path) -> dict:
+    """The size, mtime and content hash a manifest entry records for a file."""
+    stat = path.stat()
+    return {"mtime": stat.st_mtime, "size": stat.st_size, "sha256": file_hash(path)}
+
+
+class SummaryManifest:
+    """
+    Kept as MANIFEST_NAME in the output directory. For every summarized
+    source file it records the file's mtime, size and content hash and the
+    settings the summary was made with. A file is only summarized again if
+    one of these changed or its summary is missing. Safe to use from
+    several threads.
+    """
+
+    def __init__(self, output_path: Path):
+        self.path = Path(output_path) / MANIFEST_NAME
+        self._changed = False
+        # guards entries and _changed
+        self._lock = threading.Lock()
+        # one writer of the manifest file at a time
+        self._save_lock = threading.Lock()
+        try:
+            with open(self.path) as f:
+                self.entries: dict[str, dict] = json.load(f)
+        except FileNotFoundError:
+            self.entries = {}
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable manifest {self.path}: {e}")
+            self.entries = {}
+
+    def is_current(self, file_path: Path, output_file: Path, settings: dict) -> bool:
+        """Whether output_file is an up to date summary of file_path."""
+        with self._lock:
+            entry = self.entries.get(str(file_path))
+        if entry is None or not output_file.exists():
+            return False
+        if entry["output_file"] != str(output_file):
+            return False
+        if any(entry.get(key) != value for key, value in settings.items()):
+            return False
+        stat = file_path.stat()
+        if stat.st_size != entry["size"]:
+            return False
+        if stat.st_mtime != entry["mtime"]:
+            # touched, but the content may be the same
+            if file_hash(file_path) != entry["sha256"]:
+                return False
+            with self._lock:
+                entry["mtime"] = stat.st_mtime
+                self._changed = True
+        return True
+
+    def record(
+        self, file_path: Path, output_file: Path, settings: dict, snapshot: dict
+    ) -> None:
+        """
+        Record output_file as the summary of file_path. snapshot is the
+        file_snapshot taken before the file was read for summarizing, so a
+        file edited while it was summarized is summarized again next time.
+        """
+        entry = {"output_file": str(output_file), **snapshot, **settings}
+        with self._lock:
+            self.entries[str(file_path)] = entry
+            self._changed = True
+
+    def save(self) -> None:
+        with self._save_lock:
+            with self._lock:
+                if not self._changed:
+                    return
+                # serialized under the lock so a concurrent record can't
+                # change entries mid dump, or be lost when _changed is reset
+                data = json.dumps(self.entries, indent=2)
+                self._changed = False
+            # write to a temporary file first so a crash never leaves half a
+            # manifest
+            tmp_path = self.path.with_suffix(".tmp")
+            try:
+                with open(tmp_path, "w") as f:
+                    f.write(data)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                with self._lock:
+                    self._changed = True
+                raise
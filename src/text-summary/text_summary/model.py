@@ -1,4 +1,5 @@
 import ollama
+from rb.lib.ollama import ensure_model
 from text_summary.summary_prompt import PROMPT
 
 SUPPORTED_MODELS = [
@@ -24,12 +25,7 @@ def ensure_model_exists(model: str) -> None:
         raise ValueError(
             f"Model '{model}' is not supported. Supported models are: {SUPPORTED_MODELS}"
         )
-    try:
-        response = ollama.pull(model)
-    except ollama.ResponseError as e:
-        raise ValueError(e.error)
-    if response.status != "success":
-        raise ValueError(f"Failed to pull model '{model}': {response}")
+    ensure_model(model)
 
 
 def summarize(model: str, text: str) -> str:
@@ -38,3 +34,13 @@ def summarize(model: str, text: str) -> str:
     if response and response["done"]:
         response = extract_response_after_think(response["response"])
     return response
+
+
+async def summarize_async(
+    client: ollama.AsyncClient, model: str, text: str, prompt: str = PROMPT, **fields
+) -> str:
+    prompt = prompt.format(text=text, **fields)
+    response = await client.generate(model, prompt)
+    if response and response["done"]:
+        response = extract_response_after_think(response["response"])
+    return response
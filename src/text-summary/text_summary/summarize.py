@@ -1,18 +1,162 @@
+import asyncio
+import time
 from pathlib import Path
-from text_summary.text_parser import PARSERS
-from text_summary.model import summarize, ensure_model_exists
+from typing import Iterator, Optional
+
+import ollama
+from text_summary.text_parser import PAGE_PARSERS, PARSERS
+from text_summary.chunking import (
+    DEFAULT_CHUNK_OVERLAP,
+    DEFAULT_CHUNK_SIZE,
+    summarize_pages,
+)
+from text_summary.manifest import PROMPT_HASH, SummaryManifest, file_snapshot
+from text_summary.model import ensure_model_exists
+from rb.lib.files import iter_files
+from rb.lib.progress import report_progress
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Number of summaries requested from ollama at the same time
+DEFAULT_CONCURRENCY = 4
+
 
 def extract_text(file_path: Path) -> str:
     parser = PARSERS.get(file_path.suffix.lower())
     return parser(file_path)
 
 
-def process_files(model: str, input_dir: str, output_dir: str) -> None:
+def extract_pages(file_path: Path) -> Iterator[str]:
+    """Yield a file's text a page at a time where the format has pages."""
+    page_parser = PAGE_PARSERS.get(file_path.suffix.lower())
+    if page_parser is not None:
+        yield from page_parser(file_path)
+    else:
+        yield extract_text(file_path)
+
+
+async def summarize_file(
+    client: ollama.AsyncClient,
+    model: str,
+    file_path: Path,
+    output_file: Path,
+    generate_slots: asyncio.Semaphore,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+) -> Optional[dict]:
+    """
+    Extract, summarize and write one file. Pages are extracted in a thread
+    so extraction overlaps with summarizing the chunks already read and the
+    summaries other files are waiting on.
+    """
+    start = time.perf_counter()
+    try:
+        summary = await summarize_pages(
+            client,
+            model,
+            extract_pages(file_path),
+            chunk_size,
+            chunk_overlap,
+            generate_slots,
+        )
+
+        await asyncio.to_thread(output_file.write_text, summary, encoding="utf-8")
+    except Exception as e:
+        logger.error(f"Error processing {file_path.name}: {e}")
+        return None
+
+    seconds = time.perf_counter() - start
+    logger.info(f"Processed: {file_path.name} -> {output_file.name} in {seconds:.2f}s")
+    return {
+        "input_file": str(file_path),
+        "output_file": str(output_file),
+        "seconds": seconds,
+    }
+
+
+async def process_files_async(
+    model: str,
+    input_path: Path,
+    output_path: Path,
+    concurrency: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+) -> tuple[list[dict], list[str]]:
+    """
+    Summarize every supported file in input_path with up to `concurrency`
+    requests to ollama in flight, counting each chunk of a long document as
+    a request. At most twice that many files are read ahead, so extracted
+    text waiting for a free slot stays bounded.
+
+    Files whose summary in output_path is still current according to the
+    manifest are skipped. Returns the results for the summarized files and
+    the output files of the skipped ones.
+    """
+    settings = {
+        "model": model,
+        "prompt_hash": PROMPT_HASH,
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+    }
+    manifest = SummaryManifest(output_path)
+    file_paths, skipped = [], []
+    for file_path in iter_files(input_path, PARSERS, max_depth=0):
+        output_file = output_path / (file_path.stem + ".txt")
+        if manifest.is_current(file_path, output_file, settings):
+            skipped.append(str(output_file))
+        else:
+            file_paths.append(file_path)
+    if skipped:
+        logger.info(f"Skipping {len(skipped)} unchanged files")
+
+    client = ollama.AsyncClient()
+    generate_slots = asyncio.Semaphore(concurrency)
+    file_slots = asyncio.Semaphore(2 * concurrency)
+    results = []
+
+    async def run(file_path: Path) -> None:
+        output_file = output_path / (file_path.stem + ".txt")
+        async with file_slots:
+            snapshot = await asyncio.to_thread(file_snapshot, file_path)
+            result = await summarize_file(
+                client,
+                model,
+                file_path,
+                output_file,
+                generate_slots,
+                chunk_size,
+                chunk_overlap,
+            )
+        if result is not None:
+            manifest.record(file_path, output_file, settings, snapshot)
+            # saved after every file so an interrupted run keeps its progress
+            manifest.save()
+            results.append(result)
+            report_progress(
+                len(results) / len(file_paths),
+                f"Summarized {file_path.name} in {result['seconds']:.2f}s",
+            )
+
+    await asyncio.gather(*(run(file_path) for file_path in file_paths))
+    manifest.save()
+    return results, skipped
+
+
+def process_files(
+    model: str,
+    input_dir: str,
+    output_dir: str,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+) -> dict[str, list[str]]:
+    """
+    Summarize the new and changed files in input_dir into output_dir.
+    Returns the output files that were written ("processed") and those that
+    were already up to date ("skipped").
+    """
     ensure_model_exists(model)
     input_path = Path(input_dir)
     if not input_path.exists():
@@ -23,24 +167,21 @@ def process_files(model: str, input_dir: str, output_dir: str) -> None:
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
 
-    processed_files = set()
-    for file_path in input_path.iterdir():
-        if file_path.suffix.lower() not in PARSERS:
-            continue
-
-        try:
-            text = extract_text(file_path)
-            summary = summarize(model, text)
-
-            output_file = output_path / (file_path.stem + ".txt")
-            output_file.write_text(summary, encoding="utf-8")
-            processed_files.add(str(output_file))
-            logger.info(f"Processed: {file_path.name} -> {output_file.name}")
-        except Exception as e:
-            logger.error(f"Error processing {file_path.name}: {e}")
+    results, skipped = asyncio.run(
+        process_files_async(
+            model, input_path, output_path, concurrency, chunk_size, chunk_overlap
+        )
+    )
+    processed_files = sorted(result["output_file"] for result in results)
 
-    if not processed_files:
+    if not processed_files and not skipped:
         logger.warning(
             "No files were processed. Check the input directory for supported file types."
         )
-    return processed_files
+    elif processed_files:
+        latencies = sorted(result["seconds"] for result in results)
+        logger.info(
+            f"Summarized {len(latencies)} files, per file latency "
+            f"median {latencies[len(latencies) // 2]:.2f}s, max {latencies[-1]:.2f}s"
+        )
+    return {"processed": processed_files, "skipped": skipped}
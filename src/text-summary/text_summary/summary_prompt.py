@@ -6,3 +6,21 @@ Document:
 
 Summary:
 """
+
+CHUNK_PROMPT = """You are an expert writing assistant. The following is part {index} of a longer document. Summarize this part in clear, concise language that captures its main points.
+Just provide the summary without any additional commentary or explanation.
+
+Document part:
+{text}
+
+Summary:
+"""
+
+REDUCE_PROMPT = """You are an expert writing assistant. The following are summaries of consecutive parts of one document. Combine them into a single clear, concise summary that captures the main points, structure, and tone of the whole document.
+Just provide the summary without any additional commentary or explanation.
+
+Part summaries:
+{text}
+
+Summary:
+"""
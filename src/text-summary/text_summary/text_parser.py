@@ -1,18 +1,102 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
+from typing import Iterator, Optional
+
 import PyPDF2
 
+# PDFs with at least this many pages are parsed across a process pool
+PARALLEL_MIN_PAGES = 64
+PAGES_PER_TASK = 16
+# processes in the pool shared by every PDF being parsed, so several large
+# PDFs in flight at once don't each start a pool the size of the machine
+PDF_WORKERS = os.cpu_count() or 1
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
 
 def parse_raw_text(file_path: Path) -> str:
     return file_path.read_text(encoding="utf-8")
 
 
-def parse_pdf(file_path: Path) -> str:
-    text = ""
+def count_pdf_pages(file_path: Path) -> int:
+    with open(file_path, "rb") as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
+
+def extract_pdf_pages(file_path: Path, start: int, stop: int) -> list[str]:
+    """Text of pages [start, stop) of a PDF."""
     with open(file_path, "rb") as file:
         reader = PyPDF2.PdfReader(file)
-        for page in reader.pages:
-            text += page.extract_text() or ""
-    return text
+        return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def pdf_pool() -> ProcessPoolExecutor:
+    """The process pool shared by all PDF parsing, started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=PDF_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_pdf_pool() -> None:
+    """Stop the shared pool's processes, the next PDF starts a new one."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_pdf_pages(file_path: Path) -> Iterator[str]:
+    """
+    Yield the text of each page of a PDF in order, as it is extracted.
+
+    Large PDFs are split into page ranges that are parsed in the shared
+    process pool, which every PDF being parsed takes turns in. Pages are
+    still yielded in order, each range as soon as it and the ones before it
+    are done.
+    """
+    num_pages = count_pdf_pages(file_path)
+    if PDF_WORKERS == 1 or num_pages < PARALLEL_MIN_PAGES:
+        with open(file_path, "rb") as file:
+            reader = PyPDF2.PdfReader(file)
+            for page in reader.pages:
+                yield page.extract_text() or ""
+        return
+
+    executor = pdf_pool()
+    futures = [
+        executor.submit(
+            extract_pdf_pages,
+            file_path,
+            start,
+            min(start + PAGES_PER_TASK, num_pages),
+        )
+        for start in range(0, num_pages, PAGES_PER_TASK)
+    ]
+    try:
+        for future in futures:
+            yield from future.result()
+    except BrokenProcessPool:
+        # a worker died, start over with a new pool for the next PDF
+        shutdown_pdf_pool()
+        raise
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def parse_pdf(file_path: Path) -> str:
+    return "".join(iter_pdf_pages(file_path))
 
 
 # File extension to parser function mapping
@@ -21,3 +105,9 @@ PARSERS = {
     ".pdf": parse_pdf,
     ".md": parse_raw_text,
 }
+
+# Parsers that yield a document a page at a time, so summarization can start
+# before the whole file is parsed
+PAGE_PARSERS = {
+    ".pdf": iter_pdf_pages,
+}
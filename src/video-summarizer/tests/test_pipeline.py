@@ -0,0 +1,154 @@
+import io
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+import pytest
+from video_summarizer.pipeline import (
+    KeyframeSelector,
+    caption_frames,
+    encode_png,
+    frame_signature,
+    read_ppm_frames,
+)
+
+
+def random_frame(seed: int, height: int = 48, width: int = 64) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+
+def ppm(frame: np.ndarray) -> bytes:
+    height, width, _ = frame.shape
+    return f"P6\n{width} {height}\n255\n".encode() + frame.tobytes()
+
+
+def test_read_ppm_frames():
+    frames = [random_frame(i, 10 + i, 20 - i) for i in range(3)]
+    stream = io.BufferedReader(io.BytesIO(b"".join(ppm(f) for f in frames)))
+    read = list(read_ppm_frames(stream))
+    assert len(read) == 3
+    for expected, actual in zip(frames, read):
+        np.testing.assert_array_equal(expected, actual)
+
+
+def test_read_ppm_frames_truncated():
+    stream = io.BufferedReader(io.BytesIO(ppm(random_frame(0))[:-5]))
+    with pytest.raises(ValueError):
+        list(read_ppm_frames(stream))
+
+
+def test_encode_png():
+    frame = random_frame(0, 5, 7)
+    png = encode_png(frame)
+    assert png.startswith(b"\x89PNG\r\n\x1a\n")
+    # IHDR is the first chunk, IDAT the second
+    width, height = struct.unpack(">II", png[16:24])
+    assert (width, height) == (7, 5)
+    idat_length = struct.unpack(">I", png[33:37])[0]
+    rows = np.frombuffer(zlib.decompress(png[41 : 41 + idat_length]), np.uint8)
+    rows = rows.reshape(5, 7 * 3 + 1)
+    assert not rows[:, 0].any()
+    np.testing.assert_array_equal(rows[:, 1:].reshape(5, 7, 3), frame)
+
+
+def test_frame_signature():
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+    frame[:, 32:] = 255
+    signature = frame_signature(frame, size=4)
+    assert signature.shape == (4, 4)
+    np.testing.assert_allclose(signature[:, :2], 0)
+    np.testing.assert_allclose(signature[:, 2:], 1)
+    # frames smaller than the signature still work
+    assert frame_signature(frame[:3, :3], size=16).shape == (3, 3)
+
+
+def test_keyframe_selector_skips_similar_frames():
+    scene_a, scene_b = random_frame(1), random_frame(2)
+    noise = np.random.default_rng(3).integers(-3, 4, scene_a.shape)
+    similar_a = np.clip(scene_a + noise, 0, 255).astype(np.uint8)
+    frames = [scene_a, similar_a, scene_a, scene_b, scene_b, scene_a]
+
+    selector = KeyframeSelector(threshold=0.02, max_frames=10)
+    selected = [idx for idx, _ in selector.select(frames)]
+
+    assert selected == [1, 4, 6]
+    assert selector.skipped_similar == 3
+    assert "Captioned 3 of 6 sampled frames, skipped 3 similar" in selector.report()
+
+
+def test_keyframe_selector_threshold_zero_keeps_every_frame():
+    frames = [random_frame(1)] * 4
+    selector = KeyframeSelector(threshold=0, max_frames=10)
+    assert [idx for idx, _ in selector.select(frames)] == [1, 2, 3, 4]
+
+
+def test_keyframe_selector_stops_at_max_frames():
+    read = []
+
+    def frames():
+        for i in range(100):
+            read.append(i)
+            yield random_frame(i)
+
+    selector = KeyframeSelector(threshold=0.01, max_frames=5)
+    assert len(list(selector.select(frames()))) == 5
+    assert len(read) == 6
+    assert selector.reached_max_frames
+    assert "limit of 5 frames" in selector.report()
+
+
+def test_keyframe_selector_has_no_frame_limit_by_default():
+    frames = [random_frame(i) for i in range(300)]
+    selector = KeyframeSelector(threshold=0)
+    assert len(list(selector.select(frames))) == 300
+    assert not selector.reached_max_frames
+
+
+def test_caption_frames_overlaps_reading_and_captioning():
+    read = []
+
+    def frames():
+        for i in range(20):
+            read.append(i)
+            yield i + 1, bytes([i])
+
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def caption(idx, frame):
+        nonlocal active, max_active
+        with lock:
+            active += 1
+            max_active = max(max_active, active)
+        time.sleep(0.01)
+        with lock:
+            active -= 1
+        return f"caption {frame[0]}"
+
+    captions = caption_frames(frames(), caption, num_workers=3, queue_size=2)
+
+    assert list(captions) == list(range(1, 21))
+    assert captions[1] == "caption 0"
+    assert captions[20] == "caption 19"
+    assert max_active > 1
+    assert len(read) == 20
+
+
+def test_caption_frames_stops_reading_when_captioning_fails():
+    read = []
+
+    def frames():
+        for i in range(1000):
+            read.append(i)
+            yield i + 1, bytes([i % 256])
+
+    def caption(idx, frame):
+        raise RuntimeError("model crashed")
+
+    with pytest.raises(RuntimeError):
+        caption_frames(frames(), caption, num_workers=2, queue_size=4)
+    assert len(read) < 1000
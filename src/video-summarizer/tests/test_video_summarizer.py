@@ -1,8 +1,24 @@
 from pathlib import Path
 from unittest.mock import patch
-from video_summarizer.main import app as cli_app, APP_NAME, create_video_summary_schema
+
+import numpy as np
+import pytest
+from video_summarizer.main import (
+    app as cli_app,
+    APP_NAME,
+    SCRATCH_DIR_ENV,
+    WHISPER_MODEL_NAME,
+    Inputs,
+    Parameters,
+    create_video_summary_schema,
+    parameters_cli_parse,
+    summarize_video,
+    whisper_model,
+)
+from video_summarizer.pipeline import DEFAULT_MAX_FRAMES, DEFAULT_SCENE_THRESHOLD
 from rb.lib.common_tests import RBAppTest
-from rb.api.models import AppMetadata
+from rb.lib.whisper_models import whisper_models
+from rb.api.models import AppMetadata, DirectoryInput, FileInput
 
 
 class TestVideoSummarizer(RBAppTest):
@@ -29,17 +45,21 @@ class TestVideoSummarizer(RBAppTest):
         ]
 
     # Test the CLI including audio transcription and check whether 3 files were created at the end
-    @patch("video_summarizer.main.extract_frames_ffmpeg")
+    @patch(
+        "video_summarizer.main.iter_frames_ffmpeg",
+        return_value=[np.zeros((32, 32, 3), dtype=np.uint8)],
+    )
     @patch("video_summarizer.main.extract_audio_ffmpeg")
     @patch(
         "video_summarizer.main.transcribe_audio", return_value="Mocked transcription"
     )
+    @patch("video_summarizer.main.ensure_model")
     @patch(
         "video_summarizer.main.ollama.generate",
         return_value={"response": "Mocked summary"},
     )
     def test_video_summarizer_cli(
-        self, mock_ollama, mock_transcribe, mock_audio, mock_frames
+        self, mock_ollama, mock_ensure_model, mock_transcribe, mock_audio, mock_frames
     ):
         summarize_api = f"/{APP_NAME}/summarize-video"
         input_path = (
@@ -87,17 +107,21 @@ class TestVideoSummarizer(RBAppTest):
             file.unlink()
 
     # Test the API call including audio transcription and check whether 3 files were created at the end
-    @patch("video_summarizer.main.extract_frames_ffmpeg")
+    @patch(
+        "video_summarizer.main.iter_frames_ffmpeg",
+        return_value=[np.zeros((32, 32, 3), dtype=np.uint8)],
+    )
     @patch("video_summarizer.main.extract_audio_ffmpeg")
     @patch(
         "video_summarizer.main.transcribe_audio", return_value="Mocked transcription"
     )
+    @patch("video_summarizer.main.ensure_model")
     @patch(
         "video_summarizer.main.ollama.generate",
         return_value={"response": "Mocked summary"},
     )
     def test_video_summarizer_api(
-        self, mock_ollama, mock_transcribe, mock_audio, mock_frames
+        self, mock_ollama, mock_ensure_model, mock_transcribe, mock_audio, mock_frames
     ):
         summarize_api = f"/{APP_NAME}/summarize-video"
         input_path = (
@@ -182,12 +206,18 @@ class TestVideoSummarizer(RBAppTest):
             response.status_code != 200
         ), "Expected failure for missing output directory"
 
-    @patch("video_summarizer.main.extract_frames_ffmpeg")
+    @patch(
+        "video_summarizer.main.iter_frames_ffmpeg",
+        return_value=[np.zeros((32, 32, 3), dtype=np.uint8)],
+    )
+    @patch("video_summarizer.main.ensure_model")
     @patch(
         "video_summarizer.main.ollama.generate",
         return_value={"response": "Mocked summary no audio"},
     )
-    def test_cli_without_audio_transcription(self, mock_ollama, mock_frames):
+    def test_cli_without_audio_transcription(
+        self, mock_ollama, mock_ensure_model, mock_frames
+    ):
         summarize_api = f"/{APP_NAME}/summarize-video"
 
         input_path = (
@@ -225,12 +255,18 @@ class TestVideoSummarizer(RBAppTest):
             for file in output_path.glob("*.csv"):
                 file.unlink()
 
-    @patch("video_summarizer.main.extract_frames_ffmpeg")
+    @patch(
+        "video_summarizer.main.iter_frames_ffmpeg",
+        return_value=[np.zeros((32, 32, 3), dtype=np.uint8)],
+    )
+    @patch("video_summarizer.main.ensure_model")
     @patch(
         "video_summarizer.main.ollama.generate",
         return_value={"response": "Mocked summary no audio"},
     )
-    def test_api_without_audio_transcription(self, mock_ollama, mock_frames):
+    def test_api_without_audio_transcription(
+        self, mock_ollama, mock_ensure_model, mock_frames
+    ):
         summarize_api = f"/{APP_NAME}/summarize-video"
 
         input_path = (
@@ -280,6 +316,43 @@ class TestVideoSummarizer(RBAppTest):
             for file in output_path.glob("*.csv"):
                 file.unlink()
 
+    def test_whisper_model_uses_the_shared_registry(self):
+        assert whisper_model.get().registry is whisper_models
+        assert whisper_model.get().name == WHISPER_MODEL_NAME
+
+    @patch(
+        "video_summarizer.main.iter_frames_ffmpeg",
+        return_value=[
+            np.full((32, 32, 3), value, dtype=np.uint8) for value in [0, 128, 255]
+        ],
+    )
+    @patch("video_summarizer.main.ensure_model")
+    @patch(
+        "video_summarizer.main.ollama.generate",
+        return_value={"response": "Mocked summary"},
+    )
+    def test_api_with_keyframe_parameters(
+        self, mock_ollama, mock_ensure_model, mock_frames, tmp_path
+    ):
+        video = tmp_path / "video.mp4"
+        video.touch()
+        input_json = {
+            "inputs": {
+                "input_file": {"path": str(video)},
+                "output_directory": {"path": str(tmp_path)},
+            },
+            "parameters": {
+                "fps": 1,
+                "audio_tran": "no",
+                "scene_threshold": 0.05,
+                "max_frames": 2,
+            },
+        }
+        response = self.client.post(f"/{APP_NAME}/summarize-video", json=input_json)
+        assert response.status_code == 200, response.text
+        assert "Captioned 2 of 2 sampled frames" in response.json()["subtitle"]
+        assert "limit of 2 frames" in response.json()["subtitle"]
+
     def test_invalid_fps(self):
         summarize_api = f"/{APP_NAME}/summarize-video"
         input_path = (
@@ -300,3 +373,72 @@ class TestVideoSummarizer(RBAppTest):
         }
         response = self.client.post(summarize_api, json=input_json)
         assert response.status_code != 200, "Expected failure for invalid FPS value"
+
+
+@patch(
+    "video_summarizer.main.iter_frames_ffmpeg",
+    return_value=[np.zeros((32, 32, 3), dtype=np.uint8)],
+)
+@patch("video_summarizer.main.transcribe_audio", return_value="Mocked transcription")
+@patch("video_summarizer.main.ensure_model")
+@patch(
+    "video_summarizer.main.ollama.generate",
+    return_value={"response": "Mocked summary"},
+)
+def test_jobs_use_separate_workspaces(
+    mock_ollama, mock_ensure_model, mock_transcribe, mock_frames, tmp_path, monkeypatch
+):
+    scratch = tmp_path / "scratch"
+    scratch.mkdir()
+    monkeypatch.setenv(SCRATCH_DIR_ENV, str(scratch))
+    video = tmp_path / "video.mp4"
+    video.touch()
+    audio_paths = []
+
+    def fake_extract_audio(video_path, audio_path):
+        assert Path(audio_path).parent.parent == scratch
+        Path(audio_path).touch()
+        audio_paths.append(audio_path)
+
+    inputs = Inputs(
+        input_file=FileInput(path=video),
+        output_directory=DirectoryInput(path=tmp_path),
+    )
+    parameters = Parameters(
+        fps=1, audio_tran="yes", scene_threshold=0.05, max_frames=10
+    )
+    with patch(
+        "video_summarizer.main.extract_audio_ffmpeg", side_effect=fake_extract_audio
+    ):
+        first = summarize_video(inputs, parameters)
+        second = summarize_video(inputs, parameters)
+
+    assert len(set(audio_paths)) == 2
+    assert first.root.path != second.root.path
+    # workspaces are removed once the jobs are done
+    assert list(scratch.iterdir()) == []
+
+    # and when a job fails
+    mock_ollama.side_effect = RuntimeError("ollama is down")
+    with patch(
+        "video_summarizer.main.extract_audio_ffmpeg", side_effect=fake_extract_audio
+    ), pytest.raises(RuntimeError):
+        summarize_video(inputs, parameters)
+    assert list(scratch.iterdir()) == []
+
+
+@pytest.mark.parametrize(
+    "params, scene_threshold, max_frames",
+    [
+        ("2,yes", DEFAULT_SCENE_THRESHOLD, DEFAULT_MAX_FRAMES),
+        ("2,yes,0.1", 0.1, DEFAULT_MAX_FRAMES),
+        ("2,yes,0.1,20", 0.1, 20),
+    ],
+)
+def test_parameters_cli_parse_optional_fields(params, scene_threshold, max_frames):
+    assert parameters_cli_parse(params) == {
+        "fps": 2,
+        "audio_tran": "yes",
+        "scene_threshold": scene_threshold,
+        "max_frames": max_frames,
+    }
@@ -1,7 +1,12 @@
 import os
 import subprocess
-import shutil
-from typing import TypedDict
+import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from typing_extensions import NotRequired, TypedDict
+
 from rb.lib.ml_service import MLService
 from rb.api.models import (
     ParameterSchema,
@@ -14,13 +19,27 @@ from rb.api.models import (
     FileResponse,
     EnumParameterDescriptor,
     EnumVal,
+    FloatRangeDescriptor,
+    IntRangeDescriptor,
+    RangedFloatParameterDescriptor,
+    RangedIntParameterDescriptor,
 )
 from datetime import datetime
 from pathlib import Path
 import typer
 import ollama
+import numpy as np
+from rb.lib.ollama import ensure_model
+from rb.lib.whisper_models import SharedWhisperModel
+from video_summarizer.pipeline import (
+    DEFAULT_MAX_FRAMES,
+    DEFAULT_SCENE_THRESHOLD,
+    KeyframeSelector,
+    caption_frames,
+    encode_png,
+    iter_frames_ffmpeg,
+)
 import logging
-import whisper
 import csv
 import re
 
@@ -28,13 +47,28 @@ logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
 )
+logger = logging.getLogger(__name__)
 
 APP_NAME = "video_summarizer"
 
 VIDEO_PATH = "video.mp4"
-FRAME_FOLDER = "video_frames/"
 MODEL_NAME = "gemma3:4b"
-AUDIO_PATH = "extracted_audio.wav"
+WHISPER_MODEL_NAME = "base"
+
+# directory job workspaces are made in, e.g. a tmpfs such as /dev/shm to keep
+# extracted audio off the disk; the system temp directory if unset
+SCRATCH_DIR_ENV = "RESCUEBOX_VIDEO_SCRATCH_DIR"
+
+
+server = MLService(APP_NAME)
+
+# loaded on first use or by warmup, and shared with the audio transcription
+# plugin
+whisper_model = server.add_model(
+    "whisper",
+    lambda: SharedWhisperModel(WHISPER_MODEL_NAME),
+    warmup=SharedWhisperModel.warmup,
+)
 
 
 class Inputs(TypedDict):
@@ -45,6 +79,8 @@ class Inputs(TypedDict):
 class Parameters(TypedDict):
     fps: int
     audio_tran: str
+    scene_threshold: NotRequired[float]
+    max_frames: NotRequired[int]
 
 
 def create_video_summary_schema() -> TaskSchema:
@@ -72,10 +108,33 @@ def create_video_summary_schema() -> TaskSchema:
             default="yes",
         ),
     )
+    scene_threshold_schema = ParameterSchema(
+        key="scene_threshold",
+        label="Scene Change Threshold",
+        subtitle="How different a frame must be from the last captioned frame to be captioned (0 captions every extracted frame)",
+        value=RangedFloatParameterDescriptor(
+            range=FloatRangeDescriptor(min=0.0, max=1.0),
+            default=DEFAULT_SCENE_THRESHOLD,
+        ),
+    )
+    max_frames_schema = ParameterSchema(
+        key="max_frames",
+        label="Maximum Frames",
+        subtitle="Most frames to caption, the rest of the video is skipped (0 for no limit)",
+        value=RangedIntParameterDescriptor(
+            range=IntRangeDescriptor(min=0, max=1000),
+            default=DEFAULT_MAX_FRAMES,
+        ),
+    )
 
     return TaskSchema(
         inputs=[input_schema, output_schema],
-        parameters=[fps_param_schema, audio_tran_schema],
+        parameters=[
+            fps_param_schema,
+            audio_tran_schema,
+            scene_threshold_schema,
+            max_frames_schema,
+        ],
     )
 
 
@@ -93,75 +152,83 @@ def clean_caption_formatting(caption):
     return caption.strip()
 
 
-def extract_frames_ffmpeg(video_path, output_folder, fps=1):
-    os.makedirs(output_folder, exist_ok=True)
-    output_pattern = os.path.join(output_folder, "frame_%04d.jpg")
-    command = ["ffmpeg", "-i", video_path, "-vf", f"fps={1/fps}", output_pattern]
-    subprocess.run(command, check=True)
+def scratch_root() -> Optional[str]:
+    return os.environ.get(SCRATCH_DIR_ENV) or None
 
 
-def extract_audio_ffmpeg(video_path, audio_path=AUDIO_PATH):
+def extract_audio_ffmpeg(video_path, audio_path):
     command = ["ffmpeg", "-i", video_path, "-q:a", "0", "-map", "a", audio_path, "-y"]
     subprocess.run(command, check=True)
 
 
 def transcribe_audio(audio_path):
-    model = whisper.load_model("base")
-    result = model.transcribe(audio_path)
+    result = whisper_model.get().transcribe(audio_path)
     return result["text"]
 
 
-def summarize_video(inputs: Inputs, parameters: Parameters):
+def extract_and_transcribe_audio(video_path, audio_path):
+    extract_audio_ffmpeg(video_path, audio_path)
+    return transcribe_audio(audio_path)
 
-    fps = parameters.get("fps", 1)
 
-    # Step 1: Extract frames from the video
-    Path(FRAME_FOLDER).mkdir(parents=True, exist_ok=True)
-    extract_frames_ffmpeg(inputs["input_file"].path, FRAME_FOLDER, fps=fps)
+def caption_frame(idx: int, frame: np.ndarray) -> str:
+    prompt = f"This is frame {idx} of the video. Summarize it in one sentence."
+    try:
+        response = ollama.generate(MODEL_NAME, prompt, images=[encode_png(frame)])
+        return clean_caption_formatting(response["response"])
+    except Exception as e:
+        return f"Error - {e}"
 
-    images = sorted(
-        [
-            os.path.join(FRAME_FOLDER, f)
-            for f in os.listdir(FRAME_FOLDER)
-            if f.lower().endswith((".jpg", ".jpeg", ".png"))
-        ]
-    )
 
-    # Step 2: Extract audio and transcribe it if needed
+def summarize_video(inputs: Inputs, parameters: Parameters):
+
+    fps = parameters.get("fps", 1)
+    ensure_model(MODEL_NAME)
+
+    video_path = inputs["input_file"].path
     audio_transcribe = parameters.get("audio_tran", "yes") == "yes"
-    if audio_transcribe:
-        extract_audio_ffmpeg(inputs["input_file"].path, AUDIO_PATH)
-        transcribed_text = transcribe_audio(AUDIO_PATH)
-    else:
-        transcribed_text = "No audio transcription was requested."
+    selector = KeyframeSelector(
+        threshold=parameters.get("scene_threshold", DEFAULT_SCENE_THRESHOLD),
+        max_frames=parameters.get("max_frames", DEFAULT_MAX_FRAMES),
+    )
 
-    # Step 3: Prepare output paths
+    # Step 1: Prepare output paths, unique per job so concurrent jobs writing
+    # to the same directory do not overwrite each other
     out_path = Path(inputs["output_directory"].path)
-    out_path_captions = str(
-        out_path / f"captions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    )
-    out_path_transcription = str(
-        out_path / f"transcription_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-    )
-    out_path_summary = str(
-        out_path / f"summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-    )
+    job_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+    out_path_captions = str(out_path / f"captions_{job_id}.csv")
+    out_path_transcription = str(out_path / f"transcription_{job_id}.txt")
+    out_path_summary = str(out_path / f"summary_{job_id}.txt")
+
+    # scratch files live in a workspace of their own that is removed when the
+    # job ends, whether it succeeds or not
+    with tempfile.TemporaryDirectory(
+        prefix=f"{APP_NAME}_", dir=scratch_root()
+    ) as workspace, ThreadPoolExecutor(max_workers=1) as audio_executor:
+        # Step 2: Extract and transcribe the audio in the background if needed
+        audio_path = os.path.join(workspace, "audio.wav")
+        transcription = (
+            audio_executor.submit(extract_and_transcribe_audio, video_path, audio_path)
+            if audio_transcribe
+            else None
+        )
 
-    # Step 4: Describe each frame
-    ollama.generate(
-        MODEL_NAME,
-        "You will receive frames from a video in sequence, one at a time. For each frame, generate a concise one-sentence description.",
-    )
+        # Step 3: Describe each frame that differs from the last described
+        # one as ffmpeg extracts it
+        ollama.generate(
+            MODEL_NAME,
+            "You will receive frames from a video in sequence, one at a time. For each frame, generate a concise one-sentence description.",
+        )
+        summaries = caption_frames(
+            selector.select(iter_frames_ffmpeg(video_path, fps=fps)), caption_frame
+        )
+        logger.info(selector.report())
 
-    summaries = {}
-    for idx, image in enumerate(images, start=1):
-        prompt = f"This is frame {idx} of the video. Summarize it in one sentence."
-        try:
-            response = ollama.generate(MODEL_NAME, prompt, images=[image])
-            formatted_response = clean_caption_formatting(response["response"])
-            summaries[idx] = formatted_response
-        except Exception as e:
-            summaries[idx] = f"Error - {e}"
+        # Step 4: Wait for the transcription
+        if transcription is not None:
+            transcribed_text = transcription.result()
+        else:
+            transcribed_text = "No audio transcription was requested."
 
     # Step 5: Summarize the whole video using both visual + audio data
     if audio_transcribe:
@@ -203,11 +270,11 @@ def summarize_video(inputs: Inputs, parameters: Parameters):
     with open(out_path_summary, "w", encoding="utf-8") as f:
         f.write(final_summary.strip())
 
-    shutil.rmtree(FRAME_FOLDER, ignore_errors=True)
-    if os.path.exists(AUDIO_PATH):
-        os.remove(AUDIO_PATH)
-
-    return ResponseBody(FileResponse(path=out_path_summary, file_type="text"))
+    return ResponseBody(
+        FileResponse(
+            path=out_path_summary, file_type="text", subtitle=selector.report()
+        )
+    )
 
 
 def inputs_cli_parse(input: str) -> Inputs:
@@ -225,11 +292,18 @@ def inputs_cli_parse(input: str) -> Inputs:
 
 
 def parameters_cli_parse(params: str) -> Parameters:
-    fps_str, audio_tran = params.split(",")
-    return Parameters(fps=int(fps_str), audio_tran=audio_tran.strip())
+    fps_str, audio_tran, *optional = params.split(",")
+    # the optional fields left off the end take their defaults
+    defaults = [DEFAULT_SCENE_THRESHOLD, DEFAULT_MAX_FRAMES]
+    scene_threshold, max_frames = optional + defaults[len(optional) :]
+    return Parameters(
+        fps=int(fps_str),
+        audio_tran=audio_tran.strip(),
+        scene_threshold=float(scene_threshold),
+        max_frames=int(max_frames),
+    )
 
 
-server = MLService(APP_NAME)
 server.add_app_metadata(
     plugin_name=APP_NAME,
     name="Video Summarization",
@@ -246,7 +320,7 @@ server.add_ml_service(
     ),
     parameters_cli_parser=typer.Argument(
         parser=parameters_cli_parse,
-        help="Set interval of how often to extract frames (eg: 2 means 1 frame every 2 seconds)",
+        help="Frame interval in seconds and yes/no for audio transcription, optionally followed by the scene change threshold and the maximum number of frames to caption, 0 for no limit (eg: 2,yes or 2,yes,0.05,100)",
     ),
     short_title="Video Summarization",
     order=0,
@@ -0,0 +1,267 @@
+"""Streams frames out of ffmpeg and captions them while extraction continues."""
+
+import logging
+import queue
+import struct
+import subprocess
+import threading
+import zlib
+from typing import BinaryIO, Callable, Iterable, Iterator
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# frames waiting for a caption worker; ffmpeg blocks once the queue is full
+FRAME_QUEUE_SIZE = 8
+CAPTION_WORKERS = 2
+
+# frames are scaled down to fit in this many pixels on the longer side, which
+# is still more than the vision model looks at
+MAX_FRAME_SIDE = 1024
+
+# side of the grayscale thumbnail frames are compared by
+SIGNATURE_SIZE = 16
+DEFAULT_SCENE_THRESHOLD = 0.05
+# 0 captions every frame that passes the threshold, however long the video
+DEFAULT_MAX_FRAMES = 0
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def _read_token(stream: BinaryIO) -> bytes:
+    """Next whitespace separated token of a PPM header, b"" at end of stream."""
+    token = b""
+    while True:
+        c = stream.read(1)
+        if not c:
+            return token
+        if not c.isspace():
+            token += c
+        elif token:
+            return token
+
+
+def read_ppm_frames(stream: BinaryIO) -> Iterator[np.ndarray]:
+    """Yield the frames of a stream of binary PPM images as RGB arrays."""
+    while True:
+        magic = _read_token(stream)
+        if not magic:
+            return
+        if magic != b"P6":
+            raise ValueError("Malformed PPM in frame stream")
+        width, height, maxval = (int(_read_token(stream)) for _ in range(3))
+        if maxval != 255:
+            raise ValueError(f"Unsupported PPM max value {maxval}")
+        size = width * height * 3
+        data = stream.read(size)
+        if len(data) < size:
+            raise ValueError("Frame stream ended in the middle of a frame")
+        yield np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
+
+
+def iter_frames_ffmpeg(video_path, fps=1) -> Iterator[np.ndarray]:
+    """
+    Yield one RGB frame every fps seconds of the video, piped out of ffmpeg
+    as it decodes instead of written to disk. Closing the iterator early
+    stops ffmpeg.
+    """
+    command = [
+        "ffmpeg",
+        "-loglevel",
+        "error",
+        "-i",
+        str(video_path),
+        "-vf",
+        f"fps={1/fps},scale='min(iw,{MAX_FRAME_SIDE})':'min(ih,{MAX_FRAME_SIDE})'"
+        ":force_original_aspect_ratio=decrease",
+        "-f",
+        "image2pipe",
+        "-c:v",
+        "ppm",
+        "-",
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE)
+    try:
+        yield from read_ppm_frames(process.stdout)
+        if process.wait() != 0:
+            raise subprocess.CalledProcessError(process.returncode, command)
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        process.wait()
+
+
+def encode_png(frame: np.ndarray) -> bytes:
+    """Encode an RGB frame as PNG, the vision model does not take raw pixels."""
+    height, width, _ = frame.shape
+    # each row starts with its filter type, 0 for none
+    rows = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    rows[:, 1:] = frame.reshape(height, width * 3)
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        crc = zlib.crc32(kind + data)
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", crc)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (
+        PNG_SIGNATURE
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(rows.tobytes()))
+        + chunk(b"IEND", b"")
+    )
+
+
+def frame_signature(frame: np.ndarray, size: int = SIGNATURE_SIZE) -> np.ndarray:
+    """
+    A size x size grayscale thumbnail of the frame made of block means, with
+    values in [0, 1]. Cheap to compute and to compare, and insensitive to
+    noise and compression artifacts.
+    """
+    gray = frame @ np.array([0.299, 0.587, 0.114]) / 255
+    size = min(size, *gray.shape)
+    rows = np.linspace(0, gray.shape[0], size + 1).astype(int)
+    cols = np.linspace(0, gray.shape[1], size + 1).astype(int)
+    sums = np.add.reduceat(np.add.reduceat(gray, rows[:-1], axis=0), cols[:-1], axis=1)
+    return sums / np.outer(np.diff(rows), np.diff(cols))
+
+
+def signature_distance(a: np.ndarray, b: np.ndarray) -> float:
+    """Mean absolute difference of two signatures, 0 for identical frames."""
+    if a.shape != b.shape:
+        return 1.0
+    return float(np.abs(a - b).mean())
+
+
+class KeyframeSelector:
+    """
+    Picks the frames worth captioning out of the sampled frames: the first
+    one and then each frame whose signature differs from the last picked
+    frame by at least threshold. If max_frames is set, the rest of the video
+    is not read once that many frames are picked. Counts what it picked and
+    skipped.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_SCENE_THRESHOLD,
+        max_frames: int = DEFAULT_MAX_FRAMES,
+    ):
+        self.threshold = threshold
+        self.max_frames = max_frames
+        self.sampled = 0
+        self.selected = 0
+        self.skipped_similar = 0
+        self.reached_max_frames = False
+        self._last_signature = None
+
+    def select(self, frames: Iterable[np.ndarray]) -> Iterator[tuple[int, np.ndarray]]:
+        """Yield (sampled frame number from 1, frame) for the picked frames."""
+        for frame in frames:
+            if self.max_frames and self.selected >= self.max_frames:
+                self.reached_max_frames = True
+                logger.warning(
+                    f"Stopped at the limit of {self.max_frames} frames, the rest "
+                    "of the video is not captioned"
+                )
+                break
+            self.sampled += 1
+            signature = frame_signature(frame)
+            if (
+                self._last_signature is not None
+                and signature_distance(signature, self._last_signature) < self.threshold
+            ):
+                self.skipped_similar += 1
+                continue
+            self._last_signature = signature
+            self.selected += 1
+            yield self.sampled, frame
+
+    def report(self) -> str:
+        report = (
+            f"Captioned {self.selected} of {self.sampled} sampled frames, "
+            f"skipped {self.skipped_similar} similar frames"
+        )
+        if self.reached_max_frames:
+            report += (
+                f", stopped at the limit of {self.max_frames} frames before the "
+                "end of the video"
+            )
+        return report
+
+
+def caption_frames(
+    frames: Iterable[tuple[int, np.ndarray]],
+    caption: Callable[[int, np.ndarray], str],
+    num_workers: int = CAPTION_WORKERS,
+    queue_size: int = FRAME_QUEUE_SIZE,
+) -> dict[int, str]:
+    """
+    Caption (frame number, frame) pairs concurrently as they are produced,
+    returning captions by frame number in frame order.
+
+    frames is read in its own thread into a bounded queue that num_workers
+    threads take frames from, so decoding, which blocks once the queue is
+    full, overlaps with captioning without holding every frame in memory.
+    """
+    frame_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    captions: dict[int, str] = {}
+    errors: list[BaseException] = []
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        # give up instead of blocking forever once the workers have stopped
+        while not stop.is_set():
+            try:
+                frame_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in frames:
+                if not put(item):
+                    break
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            close = getattr(frames, "close", None)
+            if close is not None:
+                close()
+            for _ in range(num_workers):
+                put(None)
+
+    def work() -> None:
+        try:
+            while not stop.is_set():
+                try:
+                    item = frame_queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is None:
+                    return
+                idx, frame = item
+                captions[idx] = caption(idx, frame)
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+
+    producer = threading.Thread(target=produce, name="frame-reader", daemon=True)
+    workers = [
+        threading.Thread(target=work, name=f"frame-captioner-{i}", daemon=True)
+        for i in range(num_workers)
+    ]
+    producer.start()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    stop.set()
+    producer.join()
+
+    if errors:
+        raise errors[0]
+    return dict(sorted(captions.items()))